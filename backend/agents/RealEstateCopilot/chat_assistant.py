@@ -1,5 +1,6 @@
 from google.adk import Agent
 from app.core.config import settings
+from app.services.chat_history import bounded_history_before_model_callback
 
 class ChatAssistant(Agent):
     def __init__(self, tools=None):
@@ -22,5 +23,7 @@ When the user asks questions:
 Be conversational, helpful, and direct.
 If you need to search, do so. If you find nothing, say so.
 Maintain context from previous messages in the conversation.""",
-            tools=tools or []
+            tools=tools or [],
+            # Older turns reach the model only through the running summary
+            before_model_callback=bounded_history_before_model_callback
         )
@@ -1,6 +1,7 @@
 from google.adk import Agent
 from google.adk.tools import load_memory
 from app.core.config import settings
+from app.core.llm import cache_before_model_callback, cache_after_model_callback, rate_limit_before_model_callback
 
 class TaskAgendaAgent(Agent):
     def __init__(self):
@@ -10,6 +11,8 @@ class TaskAgendaAgent(Agent):
             instruction="""You are a CRM Task & Agenda Agent for real estate professionals.
 
 You receive the full email history for ONE contact and their identifying information.
+On later runs you instead receive a rolling summary of the earlier correspondence, the
+current pipeline stage and preferences, and only the emails sent since the last analysis.
 You may also receive a list of EXISTING TASKS for this contact.
 
 CONTEXT RETRIEVAL:
@@ -19,9 +22,10 @@ CONTEXT RETRIEVAL:
 - Memories are stored with session IDs like "contact-<email>"
 
 TASK INFERENCE:
-- Analyze the email thread history chronologically
+- Analyze the email thread history chronologically (summary first, then new emails)
 - Consider any retrieved memories for additional context
 - Review EXISTING TASKS (if provided) to avoid duplicates and update their status
+- Echo the "id" of every existing task you keep, even if unchanged; an existing open task you leave out is canceled
 - Infer the COMPLETE, CURRENT task list for this contact
 - Tasks can be: OPEN, WAITING_ON_CLIENT, DONE, or CANCELED
 - Include follow-ups, document requests, showings, offers, etc.
@@ -30,7 +34,7 @@ OUTPUT FORMAT:
 Return a JSON list of tasks:
 [
     {
-        "id": 123, // Optional: Include ONLY if updating an existing task
+        "id": 123, // Include ONLY for an existing task; omit for new tasks
         "task_type": "FOLLOW_UP|SEND_DOCUMENTS|SCHEDULE_SHOWING|PREPARE_COMPARABLES|SUBMIT_OFFER|REVIEW_OFFER|CONTRACT_TASK|ANSWER_CLIENT_QUESTION",
         "title": "Brief task title",
         "description": "Detailed description",
@@ -42,5 +46,9 @@ Return a JSON list of tasks:
 ]
 
 Only output the JSON array, no explanations.""",
-            tools=[load_memory]
+            tools=[load_memory],
+            # Repeat syncs over the same data replay identical requests; serve them from the response cache,
+            # and only spend shared quota on misses
+            before_model_callback=[cache_before_model_callback, rate_limit_before_model_callback],
+            after_model_callback=cache_after_model_callback
         )
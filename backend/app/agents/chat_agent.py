@@ -8,18 +8,114 @@ import json
 
 APP_NAME = "RealEstateCopilot"
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from app.tools import chat_tools
 from app.models import models
 from app.core.config import settings
-from app.core.database import SessionLocal
-from app.core.adk import session_service, memory_service, Message
+from app.core.database import SessionLocal, run_in_db_executor
+from app.core.adk import session_service, memory_service
+from app.core.adk import CachedFunctionTool
+from app.services import chat_history
+from app.tools import task_tools
 from google.adk import Agent, Runner
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.tools import ToolContext
+from google.genai import types
+from functools import lru_cache
 import logging
+# Import the ADK-compliant agent class
+from agents.RealEstateCopilot.chat_assistant import ChatAssistant
 
 APP_NAME = "RealEstateCopilot"
 logger = logging.getLogger(__name__)
 
+def _agent_user_id(tool_context: ToolContext) -> int:
+    # The runner is shared by every user, so the user comes from the invocation
+    return int(tool_context._invocation_context.user_id)
+
+async def _memoized(tool_context: ToolContext, tool_name: str, func, *args):
+    """
+    Runs a read-only chat tool, answering repeated calls within the chat session
+    from session state until the agent's data version changes.
+
+    All results live in one state entry tagged with the data version, replaced as a
+    whole when the version moves on, so stale results don't pile up in the session.
+    The version is read once per turn (invocation), not on every tool call.
+    """
+    cache = tool_context.state.get(chat_tools.TOOL_CACHE_STATE) or {}
+    if cache.get("invocation_id") != tool_context.invocation_id:
+        version = await run_in_db_executor(chat_tools.get_data_version, _agent_user_id(tool_context))
+        results = cache.get("results", {}) if cache.get("version") == version else {}
+        cache = {"version": version, "invocation_id": tool_context.invocation_id, "results": results}
+        tool_context.state[chat_tools.TOOL_CACHE_STATE] = cache
+
+    cache_key = chat_tools.tool_cache_key(tool_name, *args)
+    if cache_key in cache["results"]:
+        return cache["results"][cache_key]
+
+    result = chat_tools.to_cacheable(await run_in_db_executor(func, *args))
+    # A new dict, so the state change is recorded in the event's state delta
+    tool_context.state[chat_tools.TOOL_CACHE_STATE] = {**cache, "results": {**cache["results"], cache_key: result}}
+    return result
+
+# Tools are defined once per process. DB access is blocking, so each tool
+# hands its work to the DB executor.
+async def search_contacts(query: str, tool_context: ToolContext):
+    """Searches contacts by name or email."""
+    return await _memoized(tool_context, "search_contacts", chat_tools.search_contacts_tool, query, _agent_user_id(tool_context))
+
+async def search_tasks(query: str, tool_context: ToolContext):
+    """Searches tasks by title."""
+    return await _memoized(tool_context, "search_tasks", chat_tools.search_tasks_tool, query, _agent_user_id(tool_context))
+
+async def get_contact_profile(contact_id: int, tool_context: ToolContext):
+    """Gets detailed profile for a specific contact ID."""
+    return await _memoized(tool_context, "get_contact_profile", chat_tools.get_contact_profile_tool, contact_id)
+
+async def search_emails(query: str, tool_context: ToolContext):
+    """Semantic search over email history."""
+    return await _memoized(tool_context, "search_emails", chat_tools.vector_search_emails_tool, query, _agent_user_id(tool_context))
+
+async def count_contacts(tool_context: ToolContext):
+    """Counts total contacts."""
+    return await _memoized(tool_context, "count_contacts", chat_tools.count_contacts_tool, _agent_user_id(tool_context))
+
+async def count_tasks(tool_context: ToolContext):
+    """Counts open tasks (done and canceled ones are left out)."""
+    return await _memoized(tool_context, "count_tasks", chat_tools.count_tasks_tool, _agent_user_id(tool_context))
+
+async def create_task(tool_context: ToolContext, title: str, contact_id: Optional[int] = None, due_in_days: int = 3, priority: str = "MEDIUM"):
+    """Creates a new task. Always try to find contact_id first if for a specific person."""
+    task_data = {
+        "title": title,
+        "contact_id": contact_id,
+        "due_in_days": due_in_days,
+        "priority": priority,
+        "status": "OPEN",
+        "task_type": "FOLLOW_UP" # Default
+    }
+    task_id = await run_in_db_executor(task_tools.upsert_task_tool, task_data, _agent_user_id(tool_context))
+    # The write bumped the data version; drop the memoized results it made stale
+    tool_context.state[chat_tools.TOOL_CACHE_STATE] = None
+    return task_id
+
+CHAT_TOOLS = [
+    CachedFunctionTool(tool)
+    for tool in (search_contacts, search_tasks, get_contact_profile, search_emails, count_contacts, count_tasks, create_task)
+]
+
+@lru_cache(maxsize=None)
+def get_chat_runner() -> Runner:
+    """
+    The chat assistant and its runner, built once per process and shared by all users.
+    """
+    return Runner(
+        agent=ChatAssistant(tools=CHAT_TOOLS),
+        app_name=APP_NAME,
+        session_service=session_service,
+        memory_service=memory_service
+    )
+
 class CoachChatAgent:
     def __init__(self):
         self.model_name = settings.MODEL_NAME
@@ -28,62 +124,23 @@ class CoachChatAgent:
         """
         Processes a user message using ADK Agent and Runner.
         """
+        final = None
+        async for frame_type, payload in self.stream(agent_user_id, message, session_id, streaming=False):
+            if frame_type == "final":
+                final = payload
+        return final
+
+    async def stream(self, agent_user_id: int, message: str, session_id: str = "default_session", streaming: bool = True) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Processes a user message and yields (frame_type, payload) as the runner produces events:
+        "token" ({"text"}) for reply text, "tool_call" ({"name", "args"}) and "tool_result" ({"name"})
+        for tool progress, and finally "final" with the ChatResponse payload.
+        With streaming, model text arrives as partial deltas (ADK SSE streaming mode).
+        """
         print(f"Chat Agent received: {message} (User: {agent_user_id})")
         
         try:
-            # 1. Define tools with agent_user_id injection
-            def search_contacts(query: str):
-                """Searches contacts by name or email."""
-                return chat_tools.search_contacts_tool(query, agent_user_id)
-
-            def search_tasks(query: str):
-                """Searches tasks by title."""
-                return chat_tools.search_tasks_tool(query, agent_user_id)
-            
-            def get_contact_profile(contact_id: int):
-                """Gets detailed profile for a specific contact ID."""
-                return chat_tools.get_contact_profile_tool(contact_id)
-            
-            def search_emails(query: str):
-                """Semantic search over email history."""
-                return chat_tools.vector_search_emails_tool(query, agent_user_id)
-            
-            def count_contacts():
-                """Counts total contacts."""
-                db = SessionLocal()
-                try:
-                    return db.query(models.Contact).filter(models.Contact.agent_id == agent_user_id).count()
-                finally:
-                    db.close()
-
-            def count_tasks():
-                """Counts total tasks."""
-                db = SessionLocal()
-                try:
-                    return db.query(models.Task).filter(models.Task.agent_id == agent_user_id).count()
-                finally:
-                    db.close()
-
-            def create_task(title: str, contact_id: Optional[int] = None, due_in_days: int = 3, priority: str = "MEDIUM"):
-                """Creates a new task. Always try to find contact_id first if for a specific person."""
-                from app.tools import task_tools
-                task_data = {
-                    "title": title,
-                    "contact_id": contact_id,
-                    "due_in_days": due_in_days,
-                    "priority": priority,
-                    "status": "OPEN",
-                    "task_type": "FOLLOW_UP" # Default
-                }
-                return task_tools.upsert_task_tool(task_data, agent_user_id)
-
-            # 2. Create ADK Agent with injected tools
-            # Import the ADK-compliant agent class
-            from agents.RealEstateCopilot.chat_assistant import ChatAssistant
-            
-            agent = ChatAssistant(tools=[search_contacts, search_tasks, get_contact_profile, search_emails, count_contacts, count_tasks, create_task])
-
-            # 3. Create Session (if needed)
+            # 1. Create Session (if needed)
             # Ensure session exists for this user/chat
             # Use a unique session ID for the chat if provided, or generate one
             # The frontend passes 'session_id', we should use it.
@@ -98,6 +155,9 @@ class CoachChatAgent:
                 if not existing:
                     raise Exception("Session not found")
                 print(f"DEBUG: Session exists")
+                # Keep the stored history bounded: fold older turns into the running summary
+                if await chat_history.compact_session(session_service, existing):
+                    print(f"DEBUG: Compacted chat history for {full_session_id}")
             except Exception as e:
                 print(f"DEBUG: Creating session: {e}")
                 await session_service.create_session(app_name=APP_NAME, user_id=str(agent_user_id), session_id=full_session_id)
@@ -108,36 +168,45 @@ class CoachChatAgent:
                 else:
                     print(f"DEBUG: Session created successfully")
 
-            # 4. Run Runner
-            runner = Runner(
-                agent=agent,
-                app_name=APP_NAME,
-                session_service=session_service,
-                memory_service=memory_service
-            )
+            # 2. Run Runner
+            runner = get_chat_runner()
             
             response_text = ""
+            # Whether the current model response has already been sent as partial deltas
+            streamed_partial = False
+            run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
             
-            
-            for event in runner.run(
+            async for event in runner.run_async(
                 user_id=str(agent_user_id),
                 session_id=full_session_id,
-                new_message=Message("user", message)
+                new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+                run_config=run_config
             ):
-                # Extract text from event
-                if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts') and event.content.parts:
-                    for part in event.content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            response_text += part.text
-                elif hasattr(event, 'text') and event.text:
-                    response_text = event.text
-                elif hasattr(event, 'output') and hasattr(event.output, 'text'):
-                    response_text = event.output.text
+                parts = event.content.parts if event.content and event.content.parts else []
+                text = "".join(part.text for part in parts if part.text and not part.thought)
+
+                if event.partial:
+                    if text:
+                        streamed_partial = True
+                        yield "token", {"text": text}
+                    continue
+
+                for call in event.get_function_calls():
+                    yield "tool_call", {"name": call.name, "args": call.args or {}}
+                for result in event.get_function_responses():
+                    yield "tool_result", {"name": result.name}
+
+                # The complete (aggregated) text of a model response
+                if text:
+                    if not streamed_partial:
+                        yield "token", {"text": text}
+                    response_text += text
+                streamed_partial = False
             
             if not response_text:
                 response_text = "I processed your request but didn't have a text response."
 
-            return {
+            yield "final", {
                 "reply": response_text,
                 "structured": None
             }
@@ -146,7 +215,7 @@ class CoachChatAgent:
             print(f"Error in chat agent: {e}")
             import traceback
             traceback.print_exc()
-            return {
+            yield "final", {
                 "reply": "I encountered an error while processing your request.",
                 "structured": None
             }
@@ -2,15 +2,12 @@ from app.tools import classifier_tools
 from app.models import models
 from app.core.database import SessionLocal
 from app.core.config import settings
-from app.core.adk import session_service, memory_service, Message
+from app.core.adk import memory_service
+from app.core import llm
 import google.generativeai as genai
-from google.adk import Agent
-from google.adk.runners import Runner
 import json
-import time
-import asyncio
-# Import the new ADK-compliant agent class
-from agents.RealEstateCopilot.memory_recorder import ContactMemoryRecorder
+from collections import deque
+from datetime import datetime
 
 APP_NAME = "RealEstateCopilot"
 
@@ -19,15 +16,13 @@ class LeadClientClassifierAgent:
         self.model_name = settings.MODEL_NAME
         if settings.GOOGLE_API_KEY:
             genai.configure(api_key=settings.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel(self.model_name)
         self.batch_size = 5
-        
-        # Use the new ADK-compliant agent class
-        self.memory_agent = ContactMemoryRecorder()
+        self.max_batch_retries = 2
 
-    def run(self, agent_user_id: int):
+    def run(self, agent_user_id: int, full_refresh: bool = False):
         """
         Iterates through contacts and updates their profiles/stages in batches.
+        full_refresh re-sends every contact's whole history instead of only new mail.
         """
         print(f"Running classifier for agent {agent_user_id}")
         db = SessionLocal()
@@ -36,10 +31,12 @@ class LeadClientClassifierAgent:
             
             # Filter contacts that have emails
             contacts_with_emails = []
-            contact_data_map = {} # Map ID to (contact_obj, context_str)
+            contact_data_map = {} # Map ID to prompt context and newest sent_at
 
             for contact in contacts:
-                emails = classifier_tools.get_contact_emails_tool(contact.id)
+                # In incremental mode only mail newer than the stored summary is sent
+                since = contact.history_watermark if settings.INCREMENTAL_SUMMARIES and not full_refresh else None
+                emails = classifier_tools.get_contact_emails_tool(contact.id, since=since)
                 if not emails:
                     continue
                 
@@ -49,41 +46,71 @@ class LeadClientClassifierAgent:
                     direction = "Agent to Client" if e["direction"] == "OUTGOING" else "Client to Agent"
                     email_texts.append(f"[{direction}] Subject: {e['subject']}\nBody: {e['body_text']}")
                 
-                context = "\n\n".join(email_texts)
+                sent_times = [datetime.fromisoformat(e["sent_at"]) for e in emails if e["sent_at"]]
                 contacts_with_emails.append(contact)
-                contact_data_map[contact.id] = context
+                contact_data_map[contact.id] = {
+                    "email_history": "\n\n".join(email_texts),
+                    "history_summary": contact.history_summary if since else None,
+                    "current_stage": contact.pipeline_stage,
+                    "preferences": contact.preferences,
+                    "watermark": max(sent_times) if sent_times else None,
+                }
 
             # Process in batches
             total_contacts = len(contacts_with_emails)
             print(f"Found {total_contacts} contacts with emails to classify.")
 
-            for i in range(0, total_contacts, self.batch_size):
-                batch = contacts_with_emails[i : i + self.batch_size]
-                print(f"Processing batch {i//self.batch_size + 1} ({len(batch)} contacts)...")
+            # Contacts missing from or invalid in a response are retried in smaller batches
+            pending = deque(
+                (contacts_with_emails[i : i + self.batch_size], 0)
+                for i in range(0, total_contacts, self.batch_size)
+            )
+            batch_number = 0
+            while pending:
+                batch, attempt = pending.popleft()
+                batch_number += 1
+                print(f"Processing batch {batch_number} ({len(batch)} contacts, attempt {attempt + 1})...")
                 
-                self._process_batch(batch, contact_data_map, agent_user_id)
+                # Model calls are throttled by llm.model_rate_limiter, shared with the task agent
+                failed = self._process_batch(batch, contact_data_map, agent_user_id, use_cache=attempt == 0)
                 
-                # Rate limit handling between batches
-                if i + self.batch_size < total_contacts:
-                    time.sleep(5) 
+                if failed and attempt < self.max_batch_retries:
+                    retry_size = max(1, (len(failed) + 1) // 2)
+                    print(f"Re-queuing {len(failed)} contact(s) in batches of {retry_size}")
+                    for j in range(0, len(failed), retry_size):
+                        pending.append((failed[j : j + retry_size], attempt + 1))
+                elif failed:
+                    print(f"Giving up on contacts {[c.id for c in failed]} after {attempt + 1} attempts")
 
         finally:
             db.close()
 
-    def _process_batch(self, batch, contact_data_map, agent_user_id):
+    def _process_batch(self, batch, contact_data_map, agent_user_id, use_cache=True):
+        """
+        Classifies one batch and applies every valid result.
+        Returns the contacts that were missing or invalid in the response.
+        """
         # Construct Batch Prompt
         batch_input = []
         for contact in batch:
+            data = contact_data_map[contact.id]
             batch_input.append({
                 "contact_id": contact.id,
                 "contact_name": contact.name or contact.email,
-                "email_history": contact_data_map[contact.id]
+                "current_stage": data["current_stage"],
+                "preferences": data["preferences"],
+                "history_summary": data["history_summary"],
+                "new_emails": data["email_history"]
             })
         
         instruction = f"""
         You are a real estate assistant. Analyze the email history for the following list of contacts.
         For EACH contact, determine their pipeline stage, summary, and preferences.
 
+        "history_summary" is a rolling summary of the earlier correspondence (null if this is
+        the first analysis) and "new_emails" holds only the emails sent since it was written.
+        Treat both together as the full history, starting from the current stage and preferences.
+
         Pipeline Stages:
         - NEW_LEAD
         - CONTACTED
@@ -105,59 +132,102 @@ class LeadClientClassifierAgent:
                 "contact_id": 123,
                 "stage": "ONE_OF_THE_STAGES",
                 "summary": "Brief summary...",
-                "preferences": {{ ... }}
+                "preferences": {{ ... }},
+                "history_summary": "Updated rolling summary of the whole correspondence, folding in the new emails (max ~200 words)"
             }},
             ...
         ]
         """
 
         try:
-            response = self.model.generate_content(instruction)
-            response_text = response.text.replace("```json", "").replace("```", "").strip()
-            results = json.loads(response_text)
-            
-            if not isinstance(results, list):
-                print("Error: LLM did not return a list.")
-                return
-
-            # Update DB with classifications
-            for result in results:
-                contact_id = result.get("contact_id")
-                if not contact_id: 
-                    continue
-                
-                stage_str = result.get("stage", "NEW_LEAD")
-                new_stage = getattr(models.PipelineStage, stage_str, models.PipelineStage.NEW_LEAD)
-                summary = result.get("summary", "")
-                preferences = result.get("preferences", {})
-                
-                classifier_tools.update_contact_pipeline_stage_tool(contact_id, new_stage)
-                classifier_tools.update_contact_profile_tool(contact_id, summary, preferences)
-                print(f"Updated contact {contact_id} to {new_stage}")
-            
-            # After DB update, create ADK memory sessions for each contact
-            print("Creating contact memory sessions...")
-            # Pass contact IDs instead of objects to avoid session issues
-            contact_ids = [c.id for c in batch]
-            asyncio.run(self._create_contact_memories(contact_ids, agent_user_id))
-
+            response_text = llm.generate_text(instruction, model_name=self.model_name, use_cache=use_cache)
         except Exception as e:
             print(f"Error processing batch: {e}")
+            return list(batch)
+
+        # Keep every complete, valid entry even if the rest of the response is broken
+        batch_by_id = {contact.id: contact for contact in batch}
+        valid_results = {}
+        for result in llm.parse_json_list(response_text):
+            validated = self._validate_result(result, batch_by_id)
+            if validated:
+                valid_results[validated["contact_id"]] = validated
+        failed = [contact for contact in batch if contact.id not in valid_results]
+        if failed:
+            # Don't replay an unusable response from the cache on the next sync
+            llm.invalidate_cached_text(instruction, model_name=self.model_name)
+            print(f"Missing or invalid results for contacts {[c.id for c in failed]}")
+
+        # Update DB with classifications
+        applied_ids = []
+        for contact_id, result in valid_results.items():
+            try:
+                classifier_tools.update_contact_pipeline_stage_tool(contact_id, result["stage"])
+                classifier_tools.update_contact_profile_tool(contact_id, result["summary"], result["preferences"])
+                classifier_tools.update_contact_history_tool(
+                    contact_id,
+                    result["history_summary"],
+                    contact_data_map[contact_id]["watermark"]
+                )
+                applied_ids.append(contact_id)
+                print(f"Updated contact {contact_id} to {result['stage']}")
+            except Exception as e:
+                print(f"Error updating contact {contact_id}: {e}")
+                failed.append(batch_by_id[contact_id])
+
+        if applied_ids:
+            # After DB update, record ADK memories for each contact
+            # Pass contact IDs instead of objects to avoid session issues
+            self._create_contact_memories(applied_ids, agent_user_id)
+
+        return failed
+
+    def _validate_result(self, result, batch_by_id):
+        """
+        Normalizes one classification entry, or returns None if it can't be applied.
+        """
+        if not isinstance(result, dict):
+            return None
+        try:
+            contact_id = int(result.get("contact_id"))
+        except (TypeError, ValueError):
+            return None
+        if contact_id not in batch_by_id:
+            return None
+
+        stage = result.get("stage")
+        if stage not in models.PipelineStage.__members__:
+            return None
+        summary = result.get("summary")
+        if not isinstance(summary, str) or not summary.strip():
+            return None
+        preferences = result.get("preferences") or {}
+        if not isinstance(preferences, dict):
+            return None
+
+        history_summary = result.get("history_summary")
+        return {
+            "contact_id": contact_id,
+            "stage": models.PipelineStage[stage],
+            "summary": summary,
+            "preferences": preferences,
+            "history_summary": history_summary if isinstance(history_summary, str) and history_summary.strip() else summary,
+        }
     
-    async def _create_contact_memories(self, contact_ids, agent_user_id):
+    def _create_contact_memories(self, contact_ids, agent_user_id):
         """
-        Create ADK memory sessions for each contact with their narrative.
+        Records each contact's narrative in ADK memory under "contact-<email>".
+        The narrative is built here, so it is written directly in a single call
+        instead of being routed through a model.
         """
         db = SessionLocal()
         try:
-            for contact_id in contact_ids:
-                # Load contact from DB
-                contact = db.query(models.Contact).filter(models.Contact.id == contact_id).first()
-                if not contact:
-                    continue
-                
+            contacts = db.query(models.Contact).filter(models.Contact.id.in_(contact_ids)).all()
+
+            documents = {}
+            for contact in contacts:
                 # Build contact narrative
-                narrative = f"""Contact Profile Update:
+                documents[f"contact-{contact.email}"] = f"""Contact Profile Update:
 Name: {contact.name or 'Unknown'}
 Email: {contact.email}
 Pipeline Stage: {contact.pipeline_stage if contact.pipeline_stage else 'NEW_LEAD'}
@@ -167,64 +237,9 @@ Last Updated: {contact.updated_at}
 
 This is a comprehensive profile of the contact based on their email communication history.
 """
-                
-                # Session ID based on contact email
-                session_id = f"contact-{contact.email}"
-                
-                # Create session if it doesn't exist
-                try:
-                    # Try to get session first
-                    existing_session = await session_service.get_session(app_name=APP_NAME, user_id=str(agent_user_id), session_id=session_id)
-                    if not existing_session:
-                        raise Exception("Session not found")
-                except Exception:
-                    print(f"Creating new memory session for {contact.email}")
-                    # Create session explicitly
-                    await session_service.create_session(app_name=APP_NAME, user_id=str(agent_user_id), session_id=session_id)
-                    
-                    # Verify creation
-                    created_session = await session_service.get_session(app_name=APP_NAME, user_id=str(agent_user_id), session_id=session_id)
-                    if not created_session:
-                        print(f"CRITICAL ERROR: Failed to create session {session_id}")
-                    else:
-                        print(f"Session {session_id} created successfully")
-
-                # DEBUG: Check if session exists (Direct access for debugging)
-                print(f"DEBUG: Checking session existence for {session_id}")
-                print(f"DEBUG: APP_NAME={APP_NAME}, user_id={agent_user_id}")
-                print(f"DEBUG: session_service ID: {id(session_service)}")
-                if APP_NAME in session_service.sessions:
-                    if str(agent_user_id) in session_service.sessions[APP_NAME]:
-                        sessions = session_service.sessions[APP_NAME][str(agent_user_id)]
-                        print(f"DEBUG: Sessions for user: {list(sessions.keys())}")
-                        if session_id in sessions:
-                            print("DEBUG: Session FOUND in service!")
-                        else:
-                            print("DEBUG: Session NOT FOUND in service!")
-                    else:
-                        print(f"DEBUG: User {agent_user_id} NOT FOUND in app {APP_NAME}")
-                else:
-                    print(f"DEBUG: App {APP_NAME} NOT FOUND in service")
-
-                # Create runner for this contact
-                runner = Runner(
-                    agent=self.memory_agent,
-                    app_name=APP_NAME,
-                    session_service=session_service,
-                    memory_service=memory_service
-                )
-                
-                # Run agent to store memory
-                # We send the narrative as a user message
-                print(f"Storing memory for contact: {contact.email}")
-                for _ in runner.run(
-                    user_id=str(agent_user_id),
-                    session_id=session_id,
-                    new_message=Message("user", narrative)
-                ):
-                    pass # Just consume the stream to ensure processing
-                    
-            print("Contact memory sessions created successfully.")
+
+            memory_service.add_memory_documents(APP_NAME, str(agent_user_id), documents)
+            print(f"Recorded memories for {len(documents)} contact(s).")
         except Exception as e:
             print(f"Error creating contact memories: {e}")
             import traceback
@@ -1,16 +1,15 @@
 from app.tools import task_tools
 from app.models import models
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, WriteSessionLocal
 from app.core.config import settings
 from app.core.adk import session_service, memory_service, Message
 import google.generativeai as genai
-from google.adk import Agent
 from google.adk.runners import Runner
-from google.adk.tools import load_memory
-import os
 import json
 import time
-from datetime import datetime, timedelta, timezone
+import asyncio
+from sqlalchemy import or_, func
+from datetime import datetime, timezone
 # Import the new ADK-compliant agent class
 from agents.RealEstateCopilot.task_agenda import TaskAgendaAgent as ADKTaskAgendaAgent
 
@@ -21,230 +20,326 @@ class TaskAgendaAgent:
         self.model_name = settings.MODEL_NAME
         if settings.GOOGLE_API_KEY:
             genai.configure(api_key=settings.GOOGLE_API_KEY)
-        
+
         # Use the new ADK-compliant agent class
         self.agent = ADKTaskAgendaAgent()
+        self.concurrency = settings.TASK_AGENT_CONCURRENCY
+        self.prefetch_chunk_size = 50
+        # One runner serves every contact; sessions keep the analyses apart
+        self.runner = Runner(
+            agent=self.agent,
+            app_name=APP_NAME,
+            session_service=session_service,
+            memory_service=memory_service
+        )
 
-    def run(self, agent_user_id: int):
+    def run(self, agent_user_id: int, full_refresh: bool = False):
         """
         Runs task analysis for all contacts with email threads.
-        Now processes one contact at a time to enable memory retrieval.
+        Sync entry point for the background sync pipeline.
+        """
+        asyncio.run(self.run_async(agent_user_id, full_refresh=full_refresh))
+
+    async def run_async(self, agent_user_id: int, full_refresh: bool = False):
+        """
+        Analyzes contacts concurrently, at most TASK_AGENT_CONCURRENCY at a time.
+        Model calls from all contacts share llm.model_rate_limiter, so throughput
+        is bounded by the model quota rather than by a fixed sleep per contact.
+
+        Contacts with no new mail and no manual task edits since their last
+        inference are skipped unless full_refresh is set, which also sends the
+        full email history instead of the rolling summary.
         """
         print(f"Running task agent for agent {agent_user_id}")
         db = SessionLocal()
         try:
             # Get all threads for this agent
-            threads = db.query(models.EmailThread).join(models.Contact).filter(
+            threads = db.query(models.EmailThread.id, models.EmailThread.contact_id).join(models.Contact).filter(
                 models.Contact.agent_id == agent_user_id
             ).all()
-            
-            # Group threads by contact
-            contact_threads_map = {}
-            for thread in threads:
-                contact_id = thread.contact_id
-                if contact_id not in contact_threads_map:
-                    contact_threads_map[contact_id] = []
-                contact_threads_map[contact_id].append(thread)
-            
-            total_contacts = len(contact_threads_map)
-            print(f"Found {total_contacts} contacts with email threads to analyze.")
-            
-            # Process each contact individually (enables memory retrieval)
-            for idx, (contact_id, contact_threads) in enumerate(contact_threads_map.items(), 1):
-                contact = db.query(models.Contact).filter(models.Contact.id == contact_id).first()
-                if not contact:
-                    continue
-                
-                print(f"Processing contact {idx}/{total_contacts}: {contact.email}...")
-                
-                self._process_contact(contact, contact_threads, agent_user_id, db)
-                
-                # Rate limit between contacts
-                if idx < total_contacts:
-                    time.sleep(5)
-        
+            stale_contact_ids = None if full_refresh else self._contacts_with_new_activity(db, agent_user_id)
         finally:
             db.close()
 
-    def _process_contact(self, contact, threads, agent_user_id, db):
+        # Group threads by contact
+        contact_threads_map = {}
+        for thread_id, contact_id in threads:
+            if stale_contact_ids is not None and contact_id not in stale_contact_ids:
+                continue
+            contact_threads_map.setdefault(contact_id, []).append(thread_id)
+
+        total_contacts = len(contact_threads_map)
+        skipped = len({contact_id for _, contact_id in threads}) - total_contacts
+        print(f"Found {total_contacts} contacts with email threads to analyze ({skipped} unchanged, skipped).")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+        contact_ids = list(contact_threads_map)
+
+        async def analyze(idx, contact_id, prepared):
+            async with semaphore:
+                print(f"Processing contact {idx}/{total_contacts} (id={contact_id})...")
+                await self._process_contact(contact_id, contact_threads_map[contact_id], prepared, agent_user_id)
+
+        # Prompt context is prefetched a chunk of contacts at a time with a fixed
+        # number of IN queries, then each contact runs independently
+        # (enables memory retrieval per contact)
+        for start in range(0, total_contacts, self.prefetch_chunk_size):
+            chunk = contact_ids[start : start + self.prefetch_chunk_size]
+            contexts = await asyncio.to_thread(self._build_chunk_contexts, chunk, full_refresh)
+            await asyncio.gather(*(
+                analyze(start + offset, contact_id, contexts[contact_id])
+                for offset, contact_id in enumerate(chunk, 1)
+                if contact_id in contexts
+            ))
+        print(f"Task agent finished {total_contacts} contacts in {time.monotonic() - started:.1f}s")
+
+    async def _process_contact(self, contact_id, thread_ids, prepared, agent_user_id):
         """
         Process a single contact's threads with memory-aware analysis.
+        `prepared` is the (email, prompt, newest sent_at) built by _build_chunk_contexts.
         """
         try:
-            # Build email history for this contact
-            thread_data = []
-            for thread in threads:
-                messages = db.query(models.EmailMessage).filter(
-                    models.EmailMessage.thread_id == thread.id
-                ).order_by(models.EmailMessage.sent_at).all()
-                
-                thread_info = {
-                    "thread_id": thread.id,
-                    "subject": thread.subject,
-                    "emails": []
-                }
-                
-                for msg in messages:
-                    thread_info["emails"].append({
-                        "from": msg.from_email or "Unknown",
-                        "direction": msg.direction if msg.direction else "UNKNOWN",
-                        "subject": msg.subject,
-                        "body": msg.body_text[:500] if msg.body_text else "",  # Truncate for brevity
-                        "sent_at": str(msg.sent_at)
-                    })
-                
-                thread_data.append(thread_info)
-            
-            # Build prompt with contact identifier
-            contact_context = f"""Contact Information:
-Name: {contact.name or 'Unknown'}
-Email: {contact.email}
+            contact_email, contact_context, newest_sent_at = prepared
 
-IMPORTANT: Before analyzing, use load_memory tool to search for any existing memories about "{contact.email}" or "{contact.name or contact.email}".
-The memories may provide valuable context about this contact's journey, preferences, and history.
-
-Email Thread History:
-{json.dumps(thread_data, indent=2)}"""
+            # Run analysis (agent can call load_memory) in a throwaway session
+            session_id = f"task-analysis-{contact_id}-{int(time.time())}"
 
-            # Fetch existing tasks for this contact
-            existing_tasks = db.query(models.Task).filter(
-                models.Task.contact_id == contact.id,
-                models.Task.status != models.TaskStatus.CANCELED
-            ).all()
-            
-            if existing_tasks:
-                tasks_json = json.dumps([{
-                    "id": t.id,
-                    "title": t.title,
-                    "status": t.status,
-                    "description": t.detailed_description
-                } for t in existing_tasks], indent=2)
-                contact_context += f"\n\nExisting Tasks (Update status to DONE if completed):\n{tasks_json}\n"
-
-            contact_context += "\nBased on ALL available information (email history + any retrieved memories + existing tasks), determine the complete current task list for this contact."
-            
-            # Create runner for this analysis
-            runner = Runner(
-                agent=self.agent,
-                app_name=APP_NAME,
-                session_service=session_service,
-                memory_service=memory_service
-            )
-            
-            # Run analysis (agent can call load_memory)
-            session_id = f"task-analysis-{contact.id}-{int(time.time())}"
-            
-            # Create the session explicitly (async service called from sync context)
             try:
-                import asyncio
-                async def create_session():
-                    await session_service.create_session(app_name=APP_NAME, user_id=str(agent_user_id), session_id=session_id)
-                
-                asyncio.run(create_session())
+                await session_service.create_session(app_name=APP_NAME, user_id=str(agent_user_id), session_id=session_id)
             except Exception as e:
                 print(f"    Error creating session {session_id}: {e}")
                 return
 
             response_text = ""
-            
-            print(f"    Running ADK agent for contact {contact.email}...")
+
+            print(f"    Running ADK agent for contact {contact_email}...")
             event_count = 0
-            
-            for event in runner.run(
-                user_id=str(agent_user_id),
-                session_id=session_id,
-                new_message=Message("user", contact_context)
-            ):
-                event_count += 1
-                print(f"    Event {event_count}: {type(event).__name__}")
-                # Debug event structure
-                try:
-                    print(f"    Event vars: {vars(event)}")
-                except:
-                    print(f"    Event dir: {dir(event)}")
-                
-                # Extract text from event
-                if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts') and event.content.parts:
-                    for part in event.content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            response_text += part.text
-                elif hasattr(event, 'text') and event.text:
-                    response_text = event.text
-                elif hasattr(event, 'output') and hasattr(event.output, 'text'):
-                    response_text = event.output.text
-                
-                if response_text:
-                    print(f"    Got text response: {response_text[:100]}...")
-                    print(f"    Got output.text response: {response_text[:100]}...")
-            
-            print(f"    Total events: {event_count}")
-            print(f"    Final response length: {len(response_text)} characters")
-            
+
+            try:
+                async for event in self.runner.run_async(
+                    user_id=str(agent_user_id),
+                    session_id=session_id,
+                    new_message=Message("user", contact_context)
+                ):
+                    event_count += 1
+
+                    # Extract text from event
+                    if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts') and event.content.parts:
+                        for part in event.content.parts:
+                            if hasattr(part, 'text') and part.text:
+                                response_text += part.text
+                    elif hasattr(event, 'text') and event.text:
+                        response_text = event.text
+                    elif hasattr(event, 'output') and hasattr(event.output, 'text'):
+                        response_text = event.output.text
+            finally:
+                # Analysis sessions are never reused
+                await session_service.delete_session(app_name=APP_NAME, user_id=str(agent_user_id), session_id=session_id)
+
+            print(f"    {contact_email}: {event_count} events, {len(response_text)} characters")
+
             if not response_text:
-                print(f"  No response from agent for contact {contact.email}")
+                print(f"  No response from agent for contact {contact_email}")
                 return
-            
+
             # Parse tasks from response
-            print(f"    Parsing tasks from response...")
             response_text = response_text.replace("```json", "").replace("```", "").strip()
-            print(f"    Cleaned response: {response_text[:200]}...")
-            
+
             try:
                 tasks = json.loads(response_text)
             except json.JSONDecodeError as e:
-                print(f"  JSON decode error for contact {contact.email}: {e}")
+                print(f"  JSON decode error for contact {contact_email}: {e}")
                 print(f"  Response was: {response_text}")
                 return
-            
+
             if not isinstance(tasks, list):
-                print(f"  Invalid response format for contact {contact.email}")
+                print(f"  Invalid response format for contact {contact_email}")
                 return
-            
-            # Delete existing tasks for this contact
-            db.query(models.Task).filter(models.Task.contact_id == contact.id).delete()
-            
-            # Create new tasks
-            tasks_created = 0
-            for task_data in tasks:
-                task_type_str = task_data.get("task_type")
-                if not task_type_str:
-                    continue
-                
-                try:
-                    task_type = models.TaskType[task_type_str]
-                except KeyError:
-                    print(f"  Unknown task type: {task_type_str}")
-                    continue
-                
-                priority_str = task_data.get("priority", "MEDIUM")
-                try:
-                    priority = models.TaskPriority[priority_str]
-                except KeyError:
-                    priority = models.TaskPriority.MEDIUM
-                
-                due_in_days = task_data.get("due_in_days", 7)
-                due_date = datetime.now(timezone.utc) + timedelta(days=due_in_days)
-                
-                task = models.Task(
-                    agent_id=agent_user_id,
-                    contact_id=contact.id,
-                    task_type=task_type,
-                    title=task_data.get("title", "Untitled Task"),
-                    detailed_description=task_data.get("description", ""),
-                    priority=priority,
-                    status=models.TaskStatus.OPEN,
-                    due_date=due_date,
-                    source_thread_id=threads[0].id if threads else None
-                )
-                print(f"    DEBUG: Creating task for contact_id={contact.id} (Object: {contact})")
-                db.add(task)
-                tasks_created += 1
-                print(f"    Created task: {task.title} (Priority: {priority_str}, Due: {due_in_days} days)")
-            
-            db.commit()
-            print(f"  Created {tasks_created} task(s) for {contact.email}")
-        
+
+            await asyncio.to_thread(
+                self._save_tasks, contact_id, thread_ids, tasks, newest_sent_at, agent_user_id
+            )
+
         except Exception as e:
-            print(f"  Error processing contact {contact.email}: {e}")
+            print(f"  Error processing contact {contact_id}: {e}")
             import traceback
             traceback.print_exc()
+
+    def _contacts_with_new_activity(self, db, agent_user_id):
+        """
+        Ids of contacts whose tasks need inferring: never analyzed, mail newer
+        than the last analysis saw, or tasks edited by the user since then.
+        """
+        latest_mail = dict(db.query(
+            models.EmailThread.contact_id, func.max(models.EmailMessage.sent_at)
+        ).join(
+            models.EmailMessage, models.EmailMessage.thread_id == models.EmailThread.id
+        ).filter(
+            models.EmailThread.agent_id == agent_user_id
+        ).group_by(models.EmailThread.contact_id).all())
+
+        latest_edit = dict(db.query(
+            models.Task.contact_id, func.max(models.Task.user_edited_at)
+        ).filter(
+            models.Task.agent_id == agent_user_id,
+            models.Task.user_edited_at.isnot(None)
+        ).group_by(models.Task.contact_id).all())
+
+        stale = set()
+        for contact_id, tasks_watermark, inferred_at in db.query(
+            models.Contact.id, models.Contact.tasks_watermark, models.Contact.tasks_inferred_at
+        ).filter(models.Contact.agent_id == agent_user_id):
+            mail_at = latest_mail.get(contact_id)
+            edit_at = latest_edit.get(contact_id)
+            # Mail is compared against the newest sent_at the last run saw rather
+            # than the wall-clock run time, since imported mail can be backdated
+            if (
+                inferred_at is None
+                or (mail_at is not None and (tasks_watermark is None or mail_at > tasks_watermark))
+                or (edit_at is not None and edit_at > inferred_at)
+            ):
+                stale.add(contact_id)
+        return stale
+
+    def _build_chunk_contexts(self, contact_ids, full_refresh=False):
+        """
+        Builds analysis prompts for a chunk of contacts from three IN queries
+        (contacts, messages, open tasks) instead of per-thread lookups.
+        Returns {contact_id: (email, prompt, newest sent_at)}.
+        """
+        db = SessionLocal()
+        try:
+            contacts = db.query(models.Contact).filter(models.Contact.id.in_(contact_ids)).all()
+
+            # In incremental mode only mail newer than each contact's last analysis is loaded
+            message_query = db.query(models.EmailMessage, models.EmailThread).join(
+                models.EmailThread, models.EmailMessage.thread_id == models.EmailThread.id
+            ).join(
+                models.Contact, models.EmailThread.contact_id == models.Contact.id
+            ).filter(models.Contact.id.in_(contact_ids))
+            if settings.INCREMENTAL_SUMMARIES and not full_refresh:
+                message_query = message_query.filter(or_(
+                    models.Contact.tasks_watermark.is_(None),
+                    models.EmailMessage.sent_at > models.Contact.tasks_watermark
+                ))
+            messages_by_contact = {}
+            for msg, thread in message_query.order_by(models.EmailThread.id, models.EmailMessage.sent_at):
+                threads = messages_by_contact.setdefault(thread.contact_id, {})
+                threads.setdefault(thread.id, (thread, []))[1].append(msg)
+
+            # Fetch existing tasks for these contacts
+            tasks_by_contact = {}
+            for task in db.query(models.Task).filter(
+                models.Task.contact_id.in_(contact_ids),
+                models.Task.status != models.TaskStatus.CANCELED
+            ):
+                tasks_by_contact.setdefault(task.contact_id, []).append(task)
+
+            return {
+                contact.id: self._format_contact_context(
+                    contact,
+                    list(messages_by_contact.get(contact.id, {}).values()),
+                    tasks_by_contact.get(contact.id, []),
+                    full_refresh
+                )
+                for contact in contacts
+            }
+        finally:
+            db.close()
+
+    def _format_contact_context(self, contact, thread_messages, existing_tasks, full_refresh=False):
+        """
+        Formats one contact's prompt from prefetched (thread, messages) groups.
+        """
+        # In incremental mode only mail newer than the last analysis is sent,
+        # with the classifier's rolling summary standing in for the rest
+        incremental = settings.INCREMENTAL_SUMMARIES and not full_refresh and contact.tasks_watermark is not None
+
+        # Build email history for this contact
+        thread_data = []
+        newest_sent_at = contact.tasks_watermark
+        for thread, messages in thread_messages:
+            thread_info = {
+                "thread_id": thread.id,
+                "subject": thread.subject,
+                "emails": []
+            }
+
+            for msg in messages:
+                thread_info["emails"].append({
+                    "from": msg.from_email or "Unknown",
+                    "direction": msg.direction if msg.direction else "UNKNOWN",
+                    "subject": msg.subject,
+                    "body": msg.body_text[:500] if msg.body_text else "",  # Truncate for brevity
+                    "sent_at": str(msg.sent_at)
+                })
+                if msg.sent_at and (newest_sent_at is None or msg.sent_at > newest_sent_at):
+                    newest_sent_at = msg.sent_at
+
+            thread_data.append(thread_info)
+
+        # Build prompt with contact identifier
+        contact_context = f"""Contact Information:
+Name: {contact.name or 'Unknown'}
+Email: {contact.email}
+
+IMPORTANT: Before analyzing, use load_memory tool to search for any existing memories about "{contact.email}" or "{contact.name or contact.email}".
+The memories may provide valuable context about this contact's journey, preferences, and history.
+"""
+        if incremental:
+            contact_context += f"""
+Relationship So Far (rolling summary of all earlier emails):
+{contact.history_summary or contact.profile_summary or 'No summary yet'}
+Current Pipeline Stage: {contact.pipeline_stage or 'NEW_LEAD'}
+Known Preferences: {json.dumps(contact.preferences) if contact.preferences else 'None recorded'}
+
+New Email Activity Since Last Analysis:
+{json.dumps(thread_data, indent=2) if thread_data else 'None'}"""
+        else:
+            contact_context += f"""
+Email Thread History:
+{json.dumps(thread_data, indent=2)}"""
+
+        if existing_tasks:
+            tasks_json = json.dumps([{
+                "id": t.id,
+                "task_type": t.task_type,
+                "title": t.title,
+                "priority": t.priority,
+                "status": t.status,
+                "description": t.detailed_description
+            } for t in existing_tasks], indent=2)
+            contact_context += f"\n\nExisting Tasks (Update status to DONE if completed):\n{tasks_json}\n"
+
+        contact_context += "\nBased on ALL available information (email history or summary + new emails + any retrieved memories + existing tasks), determine the complete current task list for this contact."
+        return contact.email, contact_context, newest_sent_at
+
+    def _save_tasks(self, contact_id, thread_ids, tasks, newest_sent_at, agent_user_id):
+        """
+        Reconciles one contact's inferred tasks in its own short transaction.
+        """
+        db = WriteSessionLocal()
+        try:
+            contact = db.query(models.Contact).filter(models.Contact.id == contact_id).first()
+            if not contact:
+                return
+
+            counts = task_tools.reconcile_contact_tasks(
+                db, contact, tasks, agent_user_id,
+                source_thread_id=thread_ids[0] if thread_ids else None
+            )
+
+            contact.tasks_watermark = newest_sent_at
+            contact.tasks_inferred_at = datetime.now(timezone.utc)
+            db.add(contact)
+            db.commit()
+            print(
+                f"  Tasks for {contact.email}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['canceled']} canceled, {counts['unchanged']} unchanged"
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import auth, contacts, tasks, threads, sync, chat, admin
+from app.api.endpoints import auth, contacts, tasks, threads, sync, chat, admin, dashboard, search
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -9,5 +9,7 @@ api_router.include_router(threads.router, prefix="/email-threads", tags=["thread
 api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
 from app.api.endpoints import agenda
 api_router.include_router(agenda.router, prefix="/agenda", tags=["agenda"])
@@ -1,12 +1,16 @@
+import threading
+import time
+from collections import OrderedDict
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from app.core import security
 from app.core.config import settings, Settings
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, get_write_db
 from app.models import models
 from app.schemas import schemas
 
@@ -18,9 +22,82 @@ def get_settings() -> Settings:
     return settings
 
 
+# Columns copied into the cached snapshot (everything the endpoints read from current_user)
+_SNAPSHOT_COLUMNS = ("id", "email", "name", "role", "created_at")
+
+class UserCache:
+    """
+    Bounded LRU of token signature -> user snapshot. An entry lives until the token
+    expires or ttl_seconds pass, whichever is first, and invalidate() drops a user's entries.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict() # signature -> (token, values, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[models.User]:
+        signature = token.rpartition(".")[2]
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None:
+                return None
+            cached_token, values, expires_at = entry
+            if cached_token != token or time.time() >= expires_at:
+                del self._entries[signature]
+                return None
+            self._entries.move_to_end(signature)
+        # A fresh, unattached object per request, so no caller shares (or lazy-loads through) it
+        return models.User(**values)
+
+    def put(self, token: str, user: models.User, token_expires_at: Optional[float]):
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        values = {column: getattr(user, column) for column in _SNAPSHOT_COLUMNS}
+        signature = token.rpartition(".")[2]
+        with self._lock:
+            self._entries[signature] = (token, values, expires_at)
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            for signature in [s for s, entry in self._entries.items() if entry[1]["id"] == user_id]:
+                del self._entries[signature]
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+_CHANGED_USERS = "changed_user_ids"
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_changed(mapper, connection, target):
+    # Evicted once the change commits, so a concurrent request can't re-cache the old row
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+    else:
+        user_cache.invalidate(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _evict_changed_users(session):
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop(_CHANGED_USERS, None)
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
+    # The session only connects on a cache miss
+    user = user_cache.get(token)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -34,6 +111,7 @@ def get_current_user(
     user = db.query(models.User).filter(models.User.id == token_data.sub).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    user_cache.put(token, user, payload.get("exp"))
     return user
 
 def get_current_active_user(
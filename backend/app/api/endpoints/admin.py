@@ -1,9 +1,12 @@
 from typing import Any, Dict
 from fastapi import APIRouter, Depends
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.api import deps
 from app.models import models
 from app.core.database import SessionLocal
+from app.core import llm
+from app.core.adk import session_service
 from app.services.vector_store import VectorStore
 
 router = APIRouter()
@@ -21,9 +24,14 @@ def reset_demo(
     - Email messages
     - Tasks
     - Embeddings (vector store)
+    - ADK contact memories
     
     Preserves:
     - User accounts
+    - LLM response cache (so a re-sync after reset replays instantly)
+    
+    Every user's data version is bumped, so chat tool results cached in
+    existing chat sessions are invalidated.
     
     **Admin access required.**
     """
@@ -46,12 +54,20 @@ def reset_demo(
         embeddings_count = db.query(models.Embedding).count()
         db.query(models.Embedding).delete()
         
-        db.commit()
+        # Clear ADK memory (shared by all workers, stored in the app database)
+        memories_count = db.query(models.MemoryDocument).count()
+        db.query(models.MemoryDocument).delete()
+        
+        # Dashboard counters are rebuilt on next read
+        db.query(models.AgentStats).delete()
         
-        # Clear ADK Memory (in-memory, so we'll note it in the response)
-        # Note: InMemoryMemoryService doesn't have a clear method, but
-        # since it's in-memory, it will reset on server restart
-        memory_note = "ADK Memory will be cleared on server restart (in-memory store)"
+        # Memoized chat tool results are tagged with the data version they were read at
+        db.query(models.User).update(
+            {models.User.data_version: func.coalesce(models.User.data_version, 0) + 1},
+            synchronize_session=False
+        )
+        
+        db.commit()
         
         return {
             "success": True,
@@ -61,15 +77,37 @@ def reset_demo(
                 "email_threads": threads_count,
                 "email_messages": messages_count,
                 "tasks": tasks_count,
-                "embeddings": embeddings_count
+                "embeddings": embeddings_count,
+                "memories": memories_count
             },
             "preserved": {
                 "users": db.query(models.User).count()
-            },
-            "note": memory_note
+            }
         }
     except Exception as e:
         db.rollback()
         raise
     finally:
         db.close()
+
+@router.get("/llm-cache")
+def llm_cache_stats(
+    current_admin: models.User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    LLM response cache counters (hits, misses, evictions) and current size.
+    
+    **Admin access required.**
+    """
+    return llm.get_cache_stats()
+
+@router.get("/sessions")
+def adk_session_stats(
+    current_admin: models.User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Stored ADK session/event counts and the size of the session database.
+    
+    **Admin access required.**
+    """
+    return session_service.gauges()
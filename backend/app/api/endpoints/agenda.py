@@ -11,7 +11,7 @@ router = APIRouter()
 
 @router.get("/today", response_model=List[schemas.Task])
 def read_today_agenda(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
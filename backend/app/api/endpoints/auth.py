@@ -1,28 +1,94 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 
 from app.core import security
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import SessionLocal, run_in_db_executor
 from app.models import models
 from app.schemas import schemas
 from app.api import deps
 
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+def _get_user_by_email(email: str) -> Optional[models.User]:
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if user:
+            db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+def _set_password_hash(user_id: int, hashed_password: str):
+    db = SessionLocal()
+    try:
+        db.query(models.User).filter(models.User.id == user_id).update(
+            {models.User.hashed_password: hashed_password}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def _create_user(user_in: schemas.UserCreate, hashed_password: str) -> Optional[models.User]:
+    db = SessionLocal()
+    try:
+        user = models.User(
+            email=user_in.email,
+            hashed_password=hashed_password,
+            name=user_in.name,
+            role=user_in.role,
+        )
+        db.add(user)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Registered concurrently under the same email
+            db.rollback()
+            return None
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
 @router.post("/login", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    email, password = form_data.username, form_data.password
+    if security.login_failures.is_recent_failure(email, password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+    user = await run_in_db_executor(_get_user_by_email, email)
+    try:
+        valid = user is not None and await security.verify_password_async(password, user.hashed_password)
+    except security.PasswordHasherBusy:
+        raise _hasher_busy()
+    if not valid:
+        security.login_failures.record_failure(email, password)
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if security.needs_rehash(user.hashed_password):
+        # Moves the stored hash to the current BCRYPT_ROUNDS while the password is at hand
+        try:
+            new_hash = await security.get_password_hash_async(password)
+            await run_in_db_executor(_set_password_hash, user.id, new_hash)
+        except security.PasswordHasherBusy:
+            # Optional work: sign the user in now and rehash on a later login
+            pass
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
@@ -33,29 +99,30 @@ def login_access_token(
     }
 
 @router.post("/register", response_model=schemas.User)
-def register_user(
+async def register_user(
     *,
-    db: Session = Depends(get_db),
     user_in: schemas.UserCreate,
 ) -> Any:
     """
     Create new user without the need to be logged in
     """
-    user = db.query(models.User).filter(models.User.email == user_in.email).first()
+    user = await run_in_db_executor(_get_user_by_email, user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system",
         )
-    user = models.User(
-        email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
-        name=user_in.name,
-        role=user_in.role,
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        hashed_password = await security.get_password_hash_async(user_in.password)
+    except security.PasswordHasherBusy:
+        raise _hasher_busy()
+    user = await run_in_db_executor(_create_user, user_in, hashed_password)
+    if user is None:
+        raise HTTPException(
+            status_code=400,
+            detail="The user with this username already exists in the system",
+        )
+    security.login_failures.forget(user.email)
     return user
 
 @router.get("/me", response_model=schemas.User)
@@ -1,5 +1,7 @@
+import json
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.api import deps
 from app.models import models
@@ -9,15 +11,39 @@ from app.agents.chat_agent import CoachChatAgent
 router = APIRouter()
 
 @router.post("/", response_model=schemas.ChatResponse)
-def chat(
+async def chat(
     request: schemas.ChatRequest,
-    db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Chat with the Coach Agent.
     """
-    import asyncio
     agent = CoachChatAgent()
-    response = asyncio.run(agent.run(current_user.id, request.message, request.session_id))
+    response = await agent.run(current_user.id, request.message, request.session_id)
     return response
+
+@router.post("/stream")
+async def chat_stream(
+    request: schemas.ChatRequest,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> StreamingResponse:
+    """
+    Chat with the Coach Agent, streamed as Server-Sent Events.
+    
+    Frames are `token` ({"text"}), `tool_call` ({"name", "args"}), `tool_result` ({"name"})
+    and a closing `final` frame whose data is a ChatResponse.
+    """
+    agent = CoachChatAgent()
+
+    async def event_stream():
+        async for frame_type, payload in agent.stream(current_user.id, request.message, request.session_id):
+            if frame_type == "final":
+                payload = schemas.ChatResponse(**payload).model_dump()
+            yield f"event: {frame_type}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,35 +1,34 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.api.pagination import keyset_page
 from app.models import models
 from app.schemas import schemas
+from app.tools import chat_tools, stats_tools
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Contact])
+@router.get("/", response_model=schemas.ContactPage)
 def read_contacts(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    db: Session = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve contacts for the current agent.
+    Retrieve contacts for the current agent, most recently updated first.
     """
-    contacts = (
-        db.query(models.Contact)
-        .filter(models.Contact.agent_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = db.query(models.Contact).filter(models.Contact.agent_id == current_user.id)
+    contacts, next_cursor = keyset_page(
+        query, models.Contact.updated_at, models.Contact.id, cursor, limit, descending=True
     )
-    return contacts
+    return {"items": contacts, "next_cursor": next_cursor}
 
 @router.get("/{contact_id}", response_model=schemas.Contact)
 def read_contact(
     contact_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -62,11 +61,14 @@ def update_contact(
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
+    before = stats_tools.contact_counters(contact)
     update_data = contact_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(contact, field, value)
     
     db.add(contact)
+    chat_tools.bump_data_version(db, current_user.id)
+    stats_tools.apply_contact_change(db, current_user.id, before, stats_tools.contact_counters(contact))
     db.commit()
     db.refresh(contact)
     return contact
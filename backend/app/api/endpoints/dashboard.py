@@ -0,0 +1,20 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.models import models
+from app.schemas import schemas
+from app.tools import stats_tools
+
+router = APIRouter()
+
+@router.get("/summary", response_model=schemas.DashboardSummary)
+def read_dashboard_summary(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Dashboard counters: contacts by stage, tasks by status/priority,
+    overdue tasks and unread threads. Served from the agent's stats row.
+    """
+    return stats_tools.get_agent_stats(db, current_user.id)
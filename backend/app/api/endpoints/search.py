@@ -0,0 +1,48 @@
+from typing import Any
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.models import models
+from app.schemas import schemas
+from app.services import search_index
+from app.tools.task_tools import overdue_condition
+
+router = APIRouter()
+
+@router.get("/", response_model=schemas.SearchResults)
+def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Full-text search over the agent's contacts and tasks.
+    Every word must match (as a prefix); results are ranked best match first.
+    """
+    contacts = search_index.search_contacts(db, current_user.id, q, limit=limit)
+    tasks = search_index.search_tasks(db, current_user.id, q, limit=limit)
+
+    # Contact fields and the overdue flag for all the tasks in one query, same rule as the task list
+    details = {}
+    if tasks:
+        details = {
+            row.id: row
+            for row in db.query(
+                models.Task.id,
+                models.Contact.name.label("contact_name"),
+                models.Contact.email.label("contact_email"),
+                case((overdue_condition(datetime.utcnow()), True), else_=False).label("overdue"),
+            ).outerjoin(
+                models.Contact, models.Task.contact_id == models.Contact.id
+            ).filter(models.Task.id.in_([task.id for task in tasks]))
+        }
+    for task in tasks:
+        row = details[task.id]
+        task.overdue = bool(row.overdue)
+        task.contact_name = row.contact_name
+        task.contact_email = row.contact_email
+
+    return {"contacts": contacts, "tasks": tasks}
@@ -6,34 +6,42 @@ from app.models import models
 from app.agents.ingestion_agent import InboxIngestionAgent
 from app.agents.classifier_agent import LeadClientClassifierAgent
 from app.agents.task_agent import TaskAgendaAgent
+from app.tools import chat_tools, stats_tools
 
 router = APIRouter()
 
-def run_ingestion_agent(user_id: int):
+def run_ingestion_agent(user_id: int, full_refresh: bool = False):
     print(f"Starting sync process for user {user_id}")
     
     # 1. Ingestion
     ingestion_agent = InboxIngestionAgent()
     ingestion_agent.run(user_id)
+    chat_tools.bump_data_version_tool(user_id)
+    # A bulk load: one recount (unread threads can only be counted) instead of per-message deltas
+    stats_tools.refresh_agent_stats_tool(user_id)
     
-    # 2. Classification
+    # 2. Classification (stage changes adjust the stats as they are written)
     classifier_agent = LeadClientClassifierAgent()
-    classifier_agent.run(user_id)
+    classifier_agent.run(user_id, full_refresh=full_refresh)
+    chat_tools.bump_data_version_tool(user_id)
     
-    # 3. Task Extraction
+    # 3. Task Extraction (data version and stats are updated per reconciled contact)
     task_agent = TaskAgendaAgent()
-    task_agent.run(user_id)
+    task_agent.run(user_id, full_refresh=full_refresh)
     
     print(f"Sync process complete for user {user_id}")
 
 @router.post("/emails")
 def sync_emails(
     background_tasks: BackgroundTasks,
+    full_refresh: bool = False,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Trigger email ingestion from the sample dataset.
+    By default only contacts with new activity are re-analyzed; pass
+    full_refresh=true to re-analyze every contact from its full history.
     """
-    background_tasks.add_task(run_ingestion_agent, current_user.id)
+    background_tasks.add_task(run_ingestion_agent, current_user.id, full_refresh)
     return {"message": "Email sync started in background"}
@@ -1,18 +1,21 @@
-from typing import Any, List, Optional
+from typing import Any, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, not_
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.api.pagination import keyset_page
 from app.models import models
 from app.schemas import schemas
+from app.tools import chat_tools, stats_tools, task_tools
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Task])
+@router.get("/", response_model=schemas.TaskPage)
 def read_tasks(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    db: Session = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     status: Optional[str] = None,
     priority: Optional[str] = None,
     contact_id: Optional[int] = None,
@@ -20,10 +23,17 @@ def read_tasks(
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve tasks with filtering.
+    Retrieve tasks with filtering, soonest due first (tasks without a due date last).
     """
-    # Join with contacts to get contact information
-    query = db.query(models.Task).outerjoin(
+    now = datetime.utcnow()
+    is_overdue = task_tools.overdue_condition(now)
+    # Contact name/email and the overdue flag come back in the same row, so no lazy loads
+    query = db.query(
+        models.Task,
+        models.Contact.name.label("contact_name"),
+        models.Contact.email.label("contact_email"),
+        case((is_overdue, True), else_=False).label("overdue"),
+    ).outerjoin(
         models.Contact, models.Task.contact_id == models.Contact.id
     ).filter(models.Task.agent_id == current_user.id)
     
@@ -33,31 +43,29 @@ def read_tasks(
         query = query.filter(models.Task.priority == priority)
     if contact_id:
         query = query.filter(models.Task.contact_id == contact_id)
+    if overdue is not None:
+        # Filtered before paging, so a page is never emptied by the filter
+        query = query.filter(is_overdue if overdue else not_(is_overdue))
     
-    tasks = query.offset(skip).limit(limit).all()
+    rows, next_cursor = keyset_page(
+        query, models.Task.due_date, models.Task.id, cursor, limit,
+        key=lambda row: (row.Task.due_date, row.Task.id),
+    )
     
-    # Compute overdue flag and populate contact info dynamically for response
-    now = datetime.utcnow()
-    for task in tasks:
-        if task.due_date and task.status != models.TaskStatus.DONE and task.due_date < now:
-            task.overdue = True
-        else:
-            task.overdue = False
-        
-        # Populate contact info if contact exists
-        if task.contact:
-            task.contact_name = task.contact.name
-            task.contact_email = task.contact.email
-            
-    if overdue is not None:
-        tasks = [t for t in tasks if t.overdue == overdue]
+    tasks = []
+    for row in rows:
+        task = row.Task
+        task.overdue = bool(row.overdue)
+        task.contact_name = row.contact_name
+        task.contact_email = row.contact_email
+        tasks.append(task)
 
-    return tasks
+    return {"items": tasks, "next_cursor": next_cursor}
 
 @router.get("/{task_id}", response_model=schemas.Task)
 def read_task(
     task_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -72,10 +80,7 @@ def read_task(
         raise HTTPException(status_code=404, detail="Task not found")
     
     now = datetime.utcnow()
-    if task.due_date and task.status != models.TaskStatus.DONE and task.due_date < now:
-        task.overdue = True
-    else:
-        task.overdue = False
+    task.overdue = task_tools.is_overdue(task, now)
     
     # Populate contact info if contact exists
     if task.contact:
@@ -102,6 +107,7 @@ def update_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    before = stats_tools.task_counters(task)
     update_data = task_in.dict(exclude_unset=True)
     
     # Handle completion
@@ -113,16 +119,17 @@ def update_task(
     for field, value in update_data.items():
         if field != "notes": # Notes not in DB yet
              setattr(task, field, value)
+    # Lets the next sync re-infer this contact's tasks with the user's change in view
+    task.user_edited_at = datetime.utcnow()
+    chat_tools.bump_data_version(db, current_user.id)
+    stats_tools.apply_task_change(db, current_user.id, before, stats_tools.task_counters(task))
     
     db.add(task)
     db.commit()
     db.refresh(task)
     
     now = datetime.utcnow()
-    if task.due_date and task.status != models.TaskStatus.DONE and task.due_date < now:
-        task.overdue = True
-    else:
-        task.overdue = False
+    task.overdue = task_tools.is_overdue(task, now)
     
     # Populate contact info if contact exists
     if task.contact:
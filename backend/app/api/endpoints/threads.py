@@ -1,36 +1,74 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import re
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
 from app.api import deps
+from app.api.pagination import keyset_page
 from app.models import models
 from app.schemas import schemas
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.EmailThread])
+SNIPPET_CHARS = 160
+
+def _latest_message(column):
+    # Correlated lookup of the thread's newest message, a seek on (thread_id, sent_at)
+    return (
+        select(column)
+        .where(models.EmailMessage.thread_id == models.EmailThread.id)
+        .order_by(models.EmailMessage.sent_at.desc(), models.EmailMessage.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+@router.get("/", response_model=schemas.EmailThreadPage)
 def read_threads(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    db: Session = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve email threads for the current agent.
+    Retrieve email thread summaries for the current agent, most recent first.
+    One query: message bodies stay in the database except for the latest snippet.
     """
-    threads = (
-        db.query(models.EmailThread)
+    message_count = (
+        select(func.count(models.EmailMessage.id))
+        .where(models.EmailMessage.thread_id == models.EmailThread.id)
+        .scalar_subquery()
+    )
+    query = (
+        db.query(
+            models.EmailThread.id,
+            models.EmailThread.thread_id,
+            models.EmailThread.subject,
+            models.EmailThread.last_message_at,
+            models.EmailThread.contact_id,
+            models.Contact.name.label("contact_name"),
+            models.Contact.email.label("contact_email"),
+            message_count.label("message_count"),
+            _latest_message(func.substr(models.EmailMessage.body_text, 1, SNIPPET_CHARS * 2)).label("last_snippet"),
+            _latest_message(models.EmailMessage.direction).label("last_direction"),
+        )
+        .outerjoin(models.Contact, models.Contact.id == models.EmailThread.contact_id)
         .filter(models.EmailThread.agent_id == current_user.id)
-        .order_by(models.EmailThread.last_message_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
-    return threads
+    rows, next_cursor = keyset_page(
+        query, models.EmailThread.last_message_at, models.EmailThread.id, cursor, limit, descending=True
+    )
+    threads = []
+    for row in rows:
+        thread = row._asdict()
+        if thread["last_snippet"]:
+            thread["last_snippet"] = re.sub(r"\s+", " ", thread["last_snippet"]).strip()[:SNIPPET_CHARS]
+        threads.append(thread)
+    return {"items": threads, "next_cursor": next_cursor}
 
 @router.get("/{thread_id}", response_model=schemas.EmailThread)
 def read_thread(
     thread_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -38,6 +76,7 @@ def read_thread(
     """
     thread = (
         db.query(models.EmailThread)
+        .options(selectinload(models.EmailThread.messages))
         .filter(models.EmailThread.id == thread_id, models.EmailThread.agent_id == current_user.id)
         .first()
     )
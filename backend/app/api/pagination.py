@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Query
+
+# Keyset pagination: a page continues strictly after the last (sort value, id) of the previous
+# one, so with an index on (agent_id, sort column) every page costs the same as the first.
+# Rows whose sort value is NULL come after all the others, ordered by id.
+
+def encode_cursor(value: Optional[datetime], row_id: int) -> str:
+    payload = json.dumps([value.isoformat() if value else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(value) if value else None), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_page(
+    query: Query,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+    key: Optional[Callable[[Any], Tuple[Optional[datetime], int]]] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of the query ordered by (sort_column, id_column), and the cursor of the
+    next page (None on the last one). key reads (sort value, id) from a result row;
+    by default the row is the entity itself.
+    """
+    if key is None:
+        key = lambda row: (getattr(row, sort_column.key), getattr(row, id_column.key))
+    after_value, after_id = decode_cursor(cursor) if cursor else (None, None)
+    # Fetch one extra row to know whether another page follows
+    want = limit + 1
+
+    rows = []
+    if cursor is None or after_value is not None:
+        # Rows with a sort value: a range on the index, then the tie-break on id
+        if descending:
+            dated = query.filter(sort_column.isnot(None)).order_by(sort_column.desc(), id_column.desc())
+            if after_value is not None:
+                dated = dated.filter(
+                    sort_column <= after_value,
+                    or_(sort_column < after_value, id_column < after_id),
+                )
+        else:
+            dated = query.filter(sort_column.isnot(None)).order_by(sort_column, id_column)
+            if after_value is not None:
+                dated = dated.filter(
+                    sort_column >= after_value,
+                    or_(sort_column > after_value, id_column > after_id),
+                )
+        rows = dated.limit(want).all()
+
+    if len(rows) < want:
+        undated = query.filter(sort_column.is_(None))
+        if descending:
+            undated = undated.order_by(id_column.desc())
+            if after_id is not None and after_value is None:
+                undated = undated.filter(id_column < after_id)
+        else:
+            undated = undated.order_by(id_column)
+            if after_id is not None and after_value is None:
+                undated = undated.filter(id_column > after_id)
+        rows += undated.limit(want - len(rows)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
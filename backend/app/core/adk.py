@@ -1,9 +1,282 @@
-from google.adk.sessions import InMemorySessionService
-from google.adk.memory import InMemoryMemoryService
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Index, and_, delete, func, select, text
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.database_session_service import StorageEvent, StorageSession
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.tools import FunctionTool
+from google.genai import types
+from app.core.config import settings
+from app.core.database import SessionLocal, run_in_db_executor
+from app.models import models
+from app.services.vector_store import VectorStore
+
+# ADK's own schema only indexes events by primary key, which starts with the event id
+_events_by_session = Index(
+    "ix_events_app_user_session_ts",
+    StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id, StorageEvent.timestamp,
+)
+_sessions_by_update_time = Index("ix_sessions_update_time", StorageSession.update_time)
+
+class SqliteSessionService(DatabaseSessionService):
+    """
+    ADK session store in a SQLite file, shared by every worker process.
+    Sessions with no new events for ttl_seconds are evicted, and each app/user
+    keeps at most max_sessions_per_user, dropping the least recently updated first.
+    """
+
+    def __init__(self, db_url: str, ttl_seconds: float, max_sessions_per_user: int):
+        super().__init__(db_url, connect_args={"check_same_thread": False, "timeout": 30})
+        # WAL (persisted in the file) lets workers read while another one appends events
+        with self.db_engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        # create_all skips tables that already exist, so add the indexes to older files too
+        _events_by_session.create(self.db_engine, checkfirst=True)
+        _sessions_by_update_time.create(self.db_engine, checkfirst=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions_per_user = max_sessions_per_user
+        self.evicted = 0
+
+    def _evict(self, app_name: str, user_id: str, keep_session_id: str):
+        # Events go with their session (ON DELETE CASCADE)
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self.ttl_seconds)
+        with self.database_session_factory() as sql_session:
+            expired = sql_session.execute(
+                delete(StorageSession).where(StorageSession.update_time < cutoff)
+            ).rowcount
+            overflow = (
+                select(StorageSession.id)
+                .where(
+                    StorageSession.app_name == app_name,
+                    StorageSession.user_id == user_id,
+                    StorageSession.id != keep_session_id,
+                )
+                .order_by(StorageSession.update_time.desc())
+                .offset(max(self.max_sessions_per_user - 1, 0))
+            )
+            dropped = sql_session.execute(
+                delete(StorageSession).where(
+                    StorageSession.app_name == app_name,
+                    StorageSession.user_id == user_id,
+                    StorageSession.id.in_(overflow),
+                )
+            ).rowcount
+            sql_session.commit()
+        self.evicted += expired + dropped
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None, session_id: Optional[str] = None):
+        session = await super().create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+        self._evict(app_name, user_id, session.id)
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config=None):
+        session = await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+        if session is not None and time.time() - session.last_update_time > self.ttl_seconds:
+            await self.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            self.evicted += 1
+            return None
+        return session
+
+    def delete_events(self, app_name: str, user_id: str, session_id: str, event_ids: List[str]):
+        """
+        Removes events from a stored session, e.g. turns already folded into a summary.
+        """
+        if not event_ids:
+            return
+        with self.database_session_factory() as sql_session:
+            sql_session.execute(
+                delete(StorageEvent).where(
+                    StorageEvent.app_name == app_name,
+                    StorageEvent.user_id == user_id,
+                    StorageEvent.session_id == session_id,
+                    StorageEvent.id.in_(event_ids),
+                )
+            )
+            sql_session.commit()
+
+    def gauges(self) -> Dict[str, int]:
+        """
+        Stored session/event counts and the size of the session database.
+        """
+        with self.database_session_factory() as sql_session:
+            sessions = sql_session.scalar(select(func.count()).select_from(StorageSession))
+            events = sql_session.scalar(select(func.count()).select_from(StorageEvent))
+            page_count = sql_session.scalar(text("PRAGMA page_count"))
+            page_size = sql_session.scalar(text("PRAGMA page_size"))
+        return {
+            "sessions": sessions,
+            "events": events,
+            "approx_bytes": page_count * page_size,
+            "evicted_total": self.evicted,
+        }
+
+MEMORY_ENTITY_TYPE = "memory_document"
+MEMORY_SEARCH_TOP_K = 5
+
+# Matches "contact-<email>" memory keys as well as a bare address
+_CONTACT_KEY_PATTERN = re.compile(r"(?:contact-)?([\w.+-]+@[\w-]+(?:\.[\w-]+)+)")
+
+class SqliteMemoryService(BaseMemoryService):
+    """
+    Memory service backed by the memory_documents table in the app database,
+    so contact memories survive restarts and every worker searches the same set.
+    Documents are embedded into the VectorStore, partitioned per app/user; a query
+    naming a contact's email is answered by a direct key lookup instead.
+    """
+
+    def add_memory_documents(self, app_name: str, user_id: str, documents: Dict[str, str], author: str = "user"):
+        """
+        Stores one narrative per memory session id (e.g. "contact-<email>"),
+        replacing whatever that session held before. One call covers any number of contacts.
+        New or changed narratives are embedded in batched requests, together with any of the
+        user's documents whose embedding failed earlier.
+        """
+        if not documents:
+            return
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            existing = {
+                doc.session_id: doc
+                for doc in db.query(models.MemoryDocument).filter(
+                    models.MemoryDocument.app_name == app_name,
+                    models.MemoryDocument.user_id == user_id,
+                    models.MemoryDocument.session_id.in_(list(documents)),
+                )
+            }
+            changed = []
+            for session_id, doc_text in documents.items():
+                doc = existing.get(session_id)
+                if doc is None:
+                    doc = models.MemoryDocument(app_name=app_name, user_id=user_id, session_id=session_id)
+                    db.add(doc)
+                elif doc.text == doc_text:
+                    continue
+                doc.author = author
+                doc.text = doc_text
+                doc.updated_at = now
+                changed.append(doc)
+            db.flush()
+            # A changed document loses its old vector with the same commit, so if embedding
+            # fails below it is left without one: retried on the next call, keyword-searched meanwhile
+            changed_ids = [doc.id for doc in changed]
+            if changed_ids:
+                db.query(models.Embedding).filter(
+                    models.Embedding.entity_type == MEMORY_ENTITY_TYPE,
+                    models.Embedding.entity_id.in_(changed_ids),
+                ).delete(synchronize_session=False)
+            db.commit()
+
+            to_embed = {doc.id: doc.text for doc in _without_embedding(_user_documents(db, app_name, user_id))}
+            VectorStore(db).upsert_embeddings(MEMORY_ENTITY_TYPE, to_embed, partition=_partition(app_name, user_id))
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def add_session_to_memory(self, session):
+        lines = [
+            " ".join(part.text for part in event.content.parts if part.text)
+            for event in session.events
+            if event.content and event.content.parts
+        ]
+        doc_text = "\n".join(line for line in lines if line)
+        if doc_text:
+            await run_in_db_executor(self.add_memory_documents, session.app_name, session.user_id, {session.id: doc_text})
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        # Both the DB and the query embedding call block, so keep them off the event loop
+        return await run_in_db_executor(self._search_memory, app_name, user_id, query)
+
+    def _search_memory(self, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        db = SessionLocal()
+        try:
+            user_docs = _user_documents(db, app_name, user_id)
+
+            key_match = _CONTACT_KEY_PATTERN.search(query)
+            if key_match:
+                email = key_match.group(1)
+                doc = user_docs.filter(
+                    models.MemoryDocument.session_id.in_({f"contact-{email}", f"contact-{email.lower()}"})
+                ).first()
+                if doc:
+                    return SearchMemoryResponse(memories=[_memory_entry(doc)])
+
+            words_in_query = _extract_words_lower(query)
+            def keyword_matches(docs):
+                return [doc for doc in docs if words_in_query & _extract_words_lower(doc.text or "")]
+
+            hits = VectorStore(db).search(
+                query, entity_type=MEMORY_ENTITY_TYPE, top_k=MEMORY_SEARCH_TOP_K, partition=_partition(app_name, user_id)
+            )
+            if not hits:
+                # Nothing embedded yet (or the query embedding failed): keyword matching over everything
+                return SearchMemoryResponse(memories=[_memory_entry(doc) for doc in keyword_matches(user_docs.all())])
+
+            hit_ids = [hit["entity_id"] for hit in hits]
+            docs = {doc.id: doc for doc in user_docs.filter(models.MemoryDocument.id.in_(hit_ids))}
+            found = [docs[doc_id] for doc_id in hit_ids if doc_id in docs]
+            # Documents whose embedding failed are invisible to the vector search; match them by keyword
+            found += keyword_matches(_without_embedding(user_docs))
+            return SearchMemoryResponse(memories=[_memory_entry(doc) for doc in found])
+        finally:
+            db.close()
+
+def _user_documents(db, app_name: str, user_id: str):
+    return db.query(models.MemoryDocument).filter(
+        models.MemoryDocument.app_name == app_name,
+        models.MemoryDocument.user_id == user_id,
+    )
+
+def _without_embedding(documents) -> List[models.MemoryDocument]:
+    return documents.outerjoin(
+        models.Embedding,
+        and_(
+            models.Embedding.entity_type == MEMORY_ENTITY_TYPE,
+            models.Embedding.entity_id == models.MemoryDocument.id,
+        )
+    ).filter(models.Embedding.id.is_(None)).all()
+
+def _partition(app_name: str, user_id: str) -> str:
+    return f"{app_name}/{user_id}"
+
+def _memory_entry(doc: models.MemoryDocument) -> MemoryEntry:
+    return MemoryEntry(
+        content=types.Content(role="user", parts=[types.Part(text=doc.text)]),
+        author=doc.author,
+        timestamp=doc.updated_at.isoformat() if doc.updated_at else None,
+    )
+
+def _extract_words_lower(value: str) -> set:
+    return {word.lower() for word in re.findall(r"[A-Za-z]+", value)}
 
 # Initialize shared services
-session_service = InMemorySessionService()
-memory_service = InMemoryMemoryService()
+session_service = SqliteSessionService(
+    settings.ADK_SESSION_DB_URL,
+    ttl_seconds=settings.ADK_SESSION_TTL_SECONDS,
+    max_sessions_per_user=settings.ADK_MAX_SESSIONS_PER_USER,
+)
+memory_service = SqliteMemoryService()
+
+class CachedFunctionTool(FunctionTool):
+    """
+    FunctionTool that builds its function declaration once, instead of
+    re-parsing the signature on every model call.
+    """
+
+    def __init__(self, func):
+        super().__init__(func)
+        self._declaration = None
+
+    def _get_declaration(self):
+        if self._declaration is None:
+            self._declaration = super()._get_declaration()
+        return self._declaration
 
 class Message:
     def __init__(self, role, text):
@@ -6,16 +6,60 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     
     DATABASE_URL: str = "sqlite:///./real_estate.db"
+
+    # SQLite connection profile (applied on every connect, see app/core/database.py)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
     
     SECRET_KEY: str = "supersecretkey"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Per-process cache of token -> user, so authenticated requests skip the users lookup.
+    # Entries expire with the token and are dropped when the user row changes in this process;
+    # the TTL bounds how long another worker can serve a changed user
+    AUTH_USER_CACHE_SIZE: int = 1024
+    AUTH_USER_CACHE_TTL_SECONDS: int = 300
+
+    # bcrypt work factor for new hashes; stored hashes with another cost are rehashed on login
+    BCRYPT_ROUNDS: int = 12
+    # Hashing runs in its own process pool; sign-ins beyond the queue limit get a 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Repeats of a failed email/password pair are rejected without hashing for this long
+    LOGIN_FAILURE_CACHE_SECONDS: int = 60
+    LOGIN_FAILURE_CACHE_SIZE: int = 10000
     
     DATASET_PATH: str = "../data/sample_emails.json"
     
     GOOGLE_API_KEY: Optional[str] = None
     MODEL_NAME: str = "gemini-2.0-flash-exp"
     EMBEDDING_MODEL_NAME: str = "text-embedding-004"
+
+    # Send only a rolling summary plus mail newer than the per-contact watermark
+    # instead of the whole history on every sync
+    INCREMENTAL_SUMMARIES: bool = True
+
+    # Contacts analyzed in parallel by the task agent (model calls are still
+    # throttled by LLM_REQUESTS_PER_MINUTE)
+    TASK_AGENT_CONCURRENCY: int = 4
+
+    # Chat history sent to the model: the last CHAT_HISTORY_TURNS turns verbatim, older
+    # turns folded into a running summary, and the whole request trimmed to the token budget
+    CHAT_HISTORY_TURNS: int = 6
+    CHAT_HISTORY_TOKEN_BUDGET: int = 6000
+
+    # Threads for blocking DB calls made from async code (see run_in_db_executor)
+    DB_EXECUTOR_WORKERS: int = 8
+
+    # ADK sessions live in their own SQLite file shared by all workers;
+    # contact memories are stored in the app database
+    ADK_SESSION_DB_URL: str = "sqlite:///./adk_sessions.db"
+
+    # ADK session store bounds (idle sessions are evicted after the TTL)
+    ADK_SESSION_TTL_SECONDS: int = 6 * 3600
+    ADK_MAX_SESSIONS_PER_USER: int = 100
     
     # Admin configuration
     ADMIN_EMAIL: str = "alex.chan@remaxmetrohomes.com"  # Demo admin user
@@ -1,12 +1,45 @@
-from sqlalchemy import create_engine
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def _sqlite_pragmas(query_only: bool = False):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers run while a sync job writes; NORMAL is durable across app crashes in WAL mode
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        if query_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+def _create_engine(query_only: bool = False, **kwargs):
+    new_engine = create_engine(
+        settings.DATABASE_URL, connect_args={"check_same_thread": False}, **kwargs
+    )
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _sqlite_pragmas(query_only))
+    return new_engine
+
+# General-purpose engine (API writes, agents, tools)
+engine = _create_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only engine for GET endpoints: with WAL these never wait on writers
+read_engine = _create_engine(query_only=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Single-connection engine for the sync pipeline. SQLite allows one writer at a time,
+# so bulk writes queue here instead of failing with "database is locked"
+write_engine = _create_engine(pool_size=1, max_overflow=0, pool_timeout=60)
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -15,3 +48,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_write_db():
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Blocking DB work called from async code (chat tools, memory search) runs here,
+# so it never ties up the event loop or the threadpool that serves sync endpoints
+db_executor = ThreadPoolExecutor(max_workers=settings.DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """
+    Runs a blocking DB function on db_executor and awaits its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
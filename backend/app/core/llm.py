@@ -1,6 +1,15 @@
 import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
+from app.core.database import SessionLocal, run_in_db_executor
+from app.models import models
 
 load_dotenv()
 
@@ -8,12 +17,54 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MODEL_NAME = os.getenv("MODEL_NAME", "gemini-2.0-flash-exp")
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "text-embedding-004")
 
+# Persistent response cache (see generate_text and the ADK model callbacks below)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Model quota shared by every agent in this process (0 disables throttling)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "12"))
+
 if not GOOGLE_API_KEY:
     # Fallback or warning - for now we just print, but in prod should log/error
     print("WARNING: GOOGLE_API_KEY not found in environment variables.")
 
 genai.configure(api_key=GOOGLE_API_KEY)
 
+class RateLimiter:
+    """
+    Spaces model calls evenly to stay under a requests-per-minute quota.
+    Slots are reserved under a thread lock, so one instance can be shared by
+    sync callers, worker threads and any number of event loops.
+    """
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            return slot - now
+
+    def acquire_sync(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+model_rate_limiter = RateLimiter(LLM_REQUESTS_PER_MINUTE)
+
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+
 def get_model(model_name: str = MODEL_NAME):
     """
     Returns a configured GenerativeModel instance.
@@ -28,13 +79,34 @@ def get_embedding_model(model_name: str = EMBEDDING_MODEL_NAME):
     """
     return model_name
 
-def generate_text(prompt: str, model_name: str = MODEL_NAME) -> str:
+def generate_text(
+    prompt: str,
+    model_name: str = MODEL_NAME,
+    generation_config: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> str:
     """
     Simple helper to generate text.
+    Identical (model, prompt, config) requests are answered from the response cache
+    unless use_cache is False or LLM_CACHE_ENABLED is off.
     """
+    cache_key = None
+    if use_cache and LLM_CACHE_ENABLED:
+        cache_key = prompt_fingerprint(model_name, normalize_prompt(prompt), generation_config)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return cached
+    else:
+        _count("bypassed")
+
+    model_rate_limiter.acquire_sync()
     model = get_model(model_name)
-    response = model.generate_content(prompt)
-    return response.text
+    response = model.generate_content(prompt, generation_config=generation_config)
+    text = response.text
+
+    if cache_key:
+        cache_put(cache_key, model_name, text)
+    return text
 
 def generate_embedding(text: str, model_name: str = EMBEDDING_MODEL_NAME) -> list[float]:
     """
@@ -47,3 +119,258 @@ def generate_embedding(text: str, model_name: str = EMBEDDING_MODEL_NAME) -> lis
         title="Embedding"
     )
     return result['embedding']
+
+EMBEDDING_BATCH_SIZE = 100 # Most texts the embedding API accepts per request
+
+def generate_embeddings(texts: List[str], model_name: str = EMBEDDING_MODEL_NAME) -> List[List[float]]:
+    """
+    Embeds many documents with one request per EMBEDDING_BATCH_SIZE texts.
+    Vectors are returned in input order.
+    """
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        result = genai.embed_content(
+            model=model_name,
+            content=texts[start:start + EMBEDDING_BATCH_SIZE],
+            task_type="retrieval_document",
+            title="Embedding"
+        )
+        vectors.extend(result['embedding'])
+    return vectors
+
+def parse_json_list(text: str) -> List[Any]:
+    """
+    Parses a JSON array from model output, tolerating code fences, prose around
+    the array and truncation. Every complete element before the point where the
+    output breaks off is returned; a lone JSON object is returned as a one-item list.
+    """
+    text = text.replace("```json", "").replace("```", "").strip()
+    try:
+        parsed = json.loads(text)
+        return parsed if isinstance(parsed, list) else [parsed]
+    except json.JSONDecodeError:
+        pass
+
+    start = text.find("[")
+    if start == -1:
+        start = text.find("{")
+        if start == -1:
+            return []
+        pos = start
+    else:
+        pos = start + 1
+
+    decoder = json.JSONDecoder()
+    items = []
+    while pos < len(text):
+        # Skip separators between elements
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            break
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            break
+        items.append(item)
+    return items
+
+# --- Response cache ---
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Collapses indentation and runs of whitespace so that prompts built from
+    differently indented f-strings hash the same.
+    """
+    lines = (" ".join(line.split()) for line in prompt.strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+def prompt_fingerprint(model_name: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Cache key for a request: sha256 over model, prompt and generation config.
+    """
+    payload = json.dumps(
+        {"model": model_name, "prompt": prompt, "config": generation_config or {}},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cache_get(cache_key: str) -> Optional[str]:
+    """
+    Returns the cached response for the key, or None if missing or expired.
+    """
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        entry = db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.cache_key == cache_key).first()
+        if entry and _is_expired(entry.created_at, now):
+            db.delete(entry)
+            db.commit()
+            entry = None
+        if not entry:
+            _count("misses")
+            return None
+
+        entry.last_accessed_at = now
+        db.commit()
+        _count("hits")
+        return entry.response_text
+    except Exception as e:
+        # A broken cache must never break generation
+        print(f"LLM cache read failed: {e}")
+        _count("misses")
+        return None
+    finally:
+        db.close()
+
+def cache_put(cache_key: str, model_name: str, response_text: str):
+    """
+    Stores a response and evicts least recently used entries beyond LLM_CACHE_MAX_ENTRIES.
+    """
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        entry = db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.cache_key == cache_key).first()
+        if not entry:
+            entry = models.LLMCacheEntry(cache_key=cache_key, model_name=model_name)
+            db.add(entry)
+        entry.response_text = response_text
+        entry.created_at = now
+        entry.last_accessed_at = now
+        db.commit()
+        _count("stores")
+
+        # Drop expired entries, then the least recently used overflow
+        cutoff = now - timedelta(seconds=LLM_CACHE_TTL_SECONDS)
+        evicted = db.query(models.LLMCacheEntry).filter(
+            models.LLMCacheEntry.created_at < cutoff
+        ).delete(synchronize_session=False)
+        overflow = db.query(models.LLMCacheEntry).count() - LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            stale_ids = [
+                row.id for row in db.query(models.LLMCacheEntry.id)
+                .order_by(models.LLMCacheEntry.last_accessed_at.asc())
+                .limit(overflow)
+            ]
+            evicted += db.query(models.LLMCacheEntry).filter(
+                models.LLMCacheEntry.id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+        if evicted:
+            db.commit()
+            _count("evictions", evicted)
+    except Exception as e:
+        db.rollback()
+        print(f"LLM cache write failed: {e}")
+    finally:
+        db.close()
+
+def invalidate_cached_text(prompt: str, model_name: str = MODEL_NAME, generation_config: Optional[Dict[str, Any]] = None):
+    """
+    Drops the cached response for a generate_text call, e.g. when it turned out to be unusable.
+    """
+    cache_key = prompt_fingerprint(model_name, normalize_prompt(prompt), generation_config)
+    db = SessionLocal()
+    try:
+        db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.cache_key == cache_key).delete()
+        db.commit()
+    finally:
+        db.close()
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters for this process plus the current number of stored entries.
+    """
+    with _cache_lock:
+        stats = dict(_cache_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["enabled"] = LLM_CACHE_ENABLED
+    db = SessionLocal()
+    try:
+        stats["entries"] = db.query(models.LLMCacheEntry).count()
+    finally:
+        db.close()
+    return stats
+
+def _count(name: str, amount: int = 1):
+    with _cache_lock:
+        _cache_stats[name] += amount
+
+def _is_expired(created_at: Optional[datetime], now: datetime) -> bool:
+    if created_at is None:
+        return True
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return now - created_at > timedelta(seconds=LLM_CACHE_TTL_SECONDS)
+
+# --- ADK integration ---
+
+_CACHE_KEY_STATE = "temp:llm_cache_key"
+_CACHE_MODEL_STATE = "temp:llm_cache_model"
+_VOLATILE_KEYS = {"id", "timestamp", "thought_signature"}
+
+def _strip_volatile(value: Any) -> Any:
+    # Function call ids and memory timestamps change on every run without changing meaning
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+def _llm_request_fingerprint(llm_request) -> str:
+    config = llm_request.config.model_dump(mode="json", exclude_none=True, exclude={"labels", "http_options"}) if llm_request.config else {}
+    system_instruction = config.pop("system_instruction", None)
+    contents = [
+        _strip_volatile(content.model_dump(mode="json", exclude_none=True))
+        for content in llm_request.contents
+    ]
+    prompt = json.dumps({"system": system_instruction, "contents": contents}, sort_keys=True)
+    return prompt_fingerprint(llm_request.model or MODEL_NAME, normalize_prompt(prompt), config)
+
+async def cache_before_model_callback(callback_context, llm_request):
+    """
+    ADK before_model_callback: answers the model call from the response cache when possible.
+    The cache lookup runs on the DB executor, off the event loop.
+    """
+    if not LLM_CACHE_ENABLED:
+        _count("bypassed")
+        return None
+
+    from google.adk.models import LlmResponse
+    from google.genai import types
+
+    cache_key = _llm_request_fingerprint(llm_request)
+    cached = await run_in_db_executor(cache_get, cache_key)
+    if cached is None:
+        callback_context.state[_CACHE_KEY_STATE] = cache_key
+        # The response is stored under the model that actually answered (agents may override it)
+        callback_context.state[_CACHE_MODEL_STATE] = llm_request.model or MODEL_NAME
+        return None
+    return LlmResponse(content=types.Content.model_validate_json(cached))
+
+async def rate_limit_before_model_callback(callback_context, llm_request):
+    """
+    ADK before_model_callback: waits for a slot from the shared model_rate_limiter.
+    List it after cache_before_model_callback so cache hits don't consume quota.
+    """
+    await model_rate_limiter.acquire()
+    return None
+
+async def cache_after_model_callback(callback_context, llm_response):
+    """
+    ADK after_model_callback: stores complete, successful model responses in the cache.
+    """
+    cache_key = callback_context.state.get(_CACHE_KEY_STATE)
+    if not cache_key or llm_response.partial or llm_response.error_code or not llm_response.content:
+        return None
+
+    content = llm_response.content.model_copy(deep=True)
+    for part in content.parts or []:
+        # ADK assigns fresh ids to cached function calls when they are replayed
+        if part.function_call:
+            part.function_call.id = None
+    model_name = callback_context.state.get(_CACHE_MODEL_STATE) or MODEL_NAME
+    await run_in_db_executor(cache_put, cache_key, model_name, content.model_dump_json(exclude_none=True))
+    callback_context.state[_CACHE_KEY_STATE] = None
+    return None
@@ -0,0 +1,191 @@
+"""
+Versioned schema migrations for the app database.
+
+Each migration runs once, in order, and its version is recorded in the schema_version
+table. Steps are idempotent (IF NOT EXISTS, a column another worker already added
+is skipped), so several workers starting against the same database at once cannot
+apply one twice.
+Run from backend/ to migrate and check that the hot queries use their indexes:
+
+    python -m app.core.migrations
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, List, Tuple
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from app.core.database import Base
+from app.models import models
+from app.services.search_index import ensure_search_index
+
+def _baseline(conn: Connection):
+    # Creates missing tables only; tables that already exist are left as they are
+    Base.metadata.create_all(bind=conn)
+
+# Columns added to existing tables after they were first created
+_ADDED_COLUMNS = {
+    "users": [("data_version", "INTEGER DEFAULT 0")],
+    "contacts": [
+        ("history_summary", "TEXT"),
+        ("history_watermark", "DATETIME"),
+        ("tasks_watermark", "DATETIME"),
+        ("tasks_inferred_at", "DATETIME"),
+    ],
+    "tasks": [("user_edited_at", "DATETIME")],
+    "embeddings": [("partition", "VARCHAR")],
+}
+
+def _add_columns(conn: Connection):
+    inspector = inspect(conn)
+    for table, columns in _ADDED_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name in existing:
+                continue
+            try:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+            except OperationalError as e:
+                # Another worker added it between the check and the ALTER
+                if "duplicate column name" not in str(e.orig):
+                    raise
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_embeddings_partition ON embeddings (partition)"))
+
+def _merge_duplicate_contacts(conn: Connection):
+    """
+    Keeps the oldest contact per (agent_id, email) and moves the threads and tasks
+    of the others onto it, so the unique index can be created.
+    """
+    duplicates = conn.execute(text(
+        "SELECT c.id, keep.id FROM contacts c "
+        "JOIN (SELECT agent_id, email, MIN(id) AS id FROM contacts WHERE email IS NOT NULL "
+        "      GROUP BY agent_id, email HAVING COUNT(*) > 1) keep "
+        "ON c.agent_id = keep.agent_id AND c.email = keep.email AND c.id != keep.id"
+    )).all()
+    for duplicate_id, keep_id in duplicates:
+        params = {"duplicate_id": duplicate_id, "keep_id": keep_id}
+        conn.execute(text("UPDATE email_threads SET contact_id = :keep_id WHERE contact_id = :duplicate_id"), params)
+        conn.execute(text("UPDATE tasks SET contact_id = :keep_id WHERE contact_id = :duplicate_id"), params)
+        conn.execute(text("DELETE FROM contacts WHERE id = :duplicate_id"), params)
+    if duplicates:
+        # Dashboard counters are rebuilt on the next read
+        conn.execute(text("DELETE FROM agent_stats"))
+        print(f"Merged {len(duplicates)} duplicate contacts")
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_contacts_agent_email ON contacts (agent_id, email)"
+    ))
+
+def _hot_query_indexes(conn: Connection):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_agent_status_due ON tasks (agent_id, status, due_date)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_email_threads_agent_last_message ON email_threads (agent_id, last_message_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_email_messages_thread_sent ON email_messages (thread_id, sent_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_embeddings_entity ON embeddings (entity_type, entity_id)"
+    ))
+
+def _pagination_indexes(conn: Connection):
+    # Contacts page by updated_at, which used to stay NULL until the first edit and was
+    # written by CURRENT_TIMESTAMP (no fraction); store every value in SQLAlchemy's format
+    conn.execute(text("UPDATE contacts SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"))
+    conn.execute(text("UPDATE contacts SET updated_at = updated_at || '.000000' WHERE length(updated_at) = 19"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_contacts_agent_updated ON contacts (agent_id, updated_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_agent_due ON tasks (agent_id, due_date)"))
+
+# Append new migrations at the end; never renumber or edit one that has shipped
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline schema", _baseline),
+    (2, "columns added since the baseline", _add_columns),
+    (3, "full-text search index", ensure_search_index),
+    (4, "unique contact per agent and email", _merge_duplicate_contacts),
+    (5, "composite indexes for hot queries", _hot_query_indexes),
+    (6, "keyset pagination indexes", _pagination_indexes),
+]
+
+def run_migrations(engine: Engine):
+    """
+    Brings the database up to the latest schema version.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, description VARCHAR, applied_at DATETIME)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT OR IGNORE INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.now(timezone.utc)}
+            )
+        print(f"Applied migration {version}: {description}")
+
+def _hot_queries():
+    # Same shape as the queries in the endpoints and tools (tests/test_migrations.py checks the
+    # statements they actually run); parameter values don't affect the plan
+    now = datetime.now(timezone.utc)
+    return [
+        # Either index serves it: the planner may take the due-date one to skip the sort
+        (("ix_tasks_agent_status_due", "ix_tasks_agent_due"), select(models.Task).where(
+            models.Task.agent_id == 1,
+            models.Task.status.in_([models.TaskStatus.OPEN, models.TaskStatus.WAITING_ON_CLIENT]),
+            models.Task.due_date < now,
+        ).order_by(models.Task.due_date)),
+        (("ix_email_threads_agent_last_message",), select(models.EmailThread).where(
+            models.EmailThread.agent_id == 1,
+        ).order_by(models.EmailThread.last_message_at.desc()).limit(50)),
+        (("uq_contacts_agent_email",), select(models.Contact).where(
+            models.Contact.agent_id == 1,
+            models.Contact.email == "client@example.com",
+        )),
+        (("ix_email_messages_thread_sent",), select(models.EmailMessage).where(
+            models.EmailMessage.thread_id == 1,
+        ).order_by(models.EmailMessage.sent_at)),
+        (("ix_contacts_agent_updated",), select(models.Contact).where(
+            models.Contact.agent_id == 1,
+            models.Contact.updated_at <= now,
+        ).order_by(models.Contact.updated_at.desc(), models.Contact.id.desc()).limit(100)),
+        (("ix_embeddings_entity",), select(models.Embedding).where(
+            models.Embedding.entity_type == "email_message",
+            models.Embedding.entity_id == 1,
+        )),
+    ]
+
+def explain(conn: Connection, statement: str, parameters: Any = ()) -> str:
+    """
+    The query plan of a SQL statement, one step per "; "-separated part.
+    """
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "; ".join(row[-1] for row in rows)
+
+def uses_index(plan: str, index_names: Iterable[str]) -> bool:
+    return any(f"USING INDEX {name} " in plan or f"USING COVERING INDEX {name} " in plan for name in index_names)
+
+def check_query_plans(engine: Engine) -> List[str]:
+    """
+    Runs EXPLAIN QUERY PLAN on each hot query and asserts it searches one of its
+    indexes rather than scanning the table. Returns the plans.
+    """
+    plans = []
+    with engine.connect() as conn:
+        for index_names, query in _hot_queries():
+            compiled = query.compile(conn, compile_kwargs={"literal_binds": True})
+            plan = explain(conn, str(compiled))
+            assert uses_index(plan, index_names), f"Expected {' or '.join(index_names)}, got: {plan}"
+            plans.append(plan)
+    return plans
+
+if __name__ == "__main__":
+    from app.core.database import engine
+    run_migrations(engine)
+    for plan in check_query_plans(engine):
+        print(plan)
+    print("All hot queries use their indexes")
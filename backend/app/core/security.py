@@ -1,7 +1,15 @@
+import asyncio
 import hashlib
+import hmac
+import multiprocessing
+import threading
+import time
 import bcrypt
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Union
 from jose import jwt
 from app.core.config import settings
 
@@ -10,10 +18,121 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     # bcrypt.checkpw expects bytes
     return bcrypt.checkpw(password_hash.encode('utf-8'), hashed_password.encode('utf-8'))
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     password_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     # bcrypt.hashpw returns bytes, we need to decode to str
-    return bcrypt.hashpw(password_hash.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password_hash.encode('utf-8'), salt).decode('utf-8')
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    True if the hash was made with a work factor other than BCRYPT_ROUNDS.
+    """
+    # Format: $2b$<cost>$<salt and hash>
+    parts = hashed_password.split("$")
+    return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != settings.BCRYPT_ROUNDS
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when PASSWORD_HASH_MAX_PENDING hash/verify calls are already queued, or when
+    a hash worker died mid-call (the next call starts a fresh pool). Either way, retry shortly.
+    """
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_pool_lock = threading.Lock()
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # spawn, not fork: the server process has threads (executors, the event loop)
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_pool
+
+def _release(_future):
+    global _pending
+    with _pool_lock:
+        _pending -= 1
+
+async def _run_in_hash_pool(func, *args):
+    # bcrypt holds a core for the whole call; running it in the request threadpool
+    # starves unrelated endpoints, so it gets its own bounded pool
+    global _pending, _hash_pool
+    with _pool_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHasherBusy()
+        _pending += 1
+        pool = _get_hash_pool()
+    try:
+        try:
+            future = pool.submit(func, *args)
+        except Exception:
+            _release(None)
+            raise
+        future.add_done_callback(_release)
+        return await asyncio.wrap_future(future)
+    except BrokenProcessPool as e:
+        # A worker died; start a fresh pool for the next call
+        with _pool_lock:
+            if _hash_pool is pool:
+                _hash_pool = None
+        raise PasswordHasherBusy() from e
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password, settings.BCRYPT_ROUNDS)
+
+class LoginFailureCache:
+    """
+    Remembers recently failed email/password pairs for ttl_seconds, so a client
+    retrying the same bad credentials is turned away without a bcrypt call.
+    Only a keyed digest of the pair is kept, never the password. Emails are
+    matched exactly, as the users lookup matches them.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict() # digest -> (email, expires_at)
+        self._lock = threading.Lock()
+
+    def _digest(self, email: str, password: str) -> str:
+        message = f"{email}\0{password}".encode('utf-8')
+        return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+    def is_recent_failure(self, email: str, password: str) -> bool:
+        digest = self._digest(email, password)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return False
+            if time.time() >= entry[1]:
+                del self._entries[digest]
+                return False
+            return True
+
+    def record_failure(self, email: str, password: str):
+        digest = self._digest(email, password)
+        with self._lock:
+            self._entries[digest] = (email, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def forget(self, email: str):
+        """
+        Drops an email's entries, e.g. once an account is created for it.
+        """
+        with self._lock:
+            for digest in [d for d, entry in self._entries.items() if entry[0] == email]:
+                del self._entries[digest]
+
+login_failures = LoginFailureCache(settings.LOGIN_FAILURE_CACHE_SIZE, settings.LOGIN_FAILURE_CACHE_SECONDS)
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
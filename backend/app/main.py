@@ -1,11 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine
+from app.core.migrations import run_migrations
 from app.api.api import api_router
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create or upgrade the schema
+run_migrations(engine)
 
 app = FastAPI(title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json")
 
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, JSON, Enum
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, JSON, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+from datetime import datetime, timezone
 from app.core.database import Base
 
 class UserRole(str, enum.Enum):
@@ -47,6 +48,9 @@ class EmailDirection(str, enum.Enum):
     INCOMING = "INCOMING"
     OUTGOING = "OUTGOING"
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -56,6 +60,7 @@ class User(Base):
     role = Column(String, default=UserRole.AGENT) # Stored as string for simplicity
     name = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    data_version = Column(Integer, default=0) # Bumped by writes to the agent's CRM data; invalidates cached chat tool results
 
     contacts = relationship("Contact", back_populates="agent")
     tasks = relationship("Task", back_populates="agent")
@@ -63,18 +68,28 @@ class User(Base):
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("uq_contacts_agent_email", "agent_id", "email", unique=True),
+        Index("ix_contacts_agent_updated", "agent_id", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     agent_id = Column(Integer, ForeignKey("users.id"))
     name = Column(String, nullable=True)
-    email = Column(String, index=True) # Unique per agent logic handled in code
+    email = Column(String, index=True) # Unique per agent (uq_contacts_agent_email)
     phone = Column(String, nullable=True)
     pipeline_stage = Column(String, default=PipelineStage.NEW_LEAD)
     profile_summary = Column(Text, nullable=True)
     preferences = Column(JSON, nullable=True)
     notes = Column(Text, nullable=True)
+    history_summary = Column(Text, nullable=True) # Rolling summary of all correspondence folded in so far
+    history_watermark = Column(DateTime(timezone=True), nullable=True) # sent_at of newest message in history_summary
+    tasks_watermark = Column(DateTime(timezone=True), nullable=True) # sent_at of newest message seen by the task agent
+    tasks_inferred_at = Column(DateTime(timezone=True), nullable=True) # When the task agent last analyzed this contact
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set in Python rather than with func.now(): SQLite's CURRENT_TIMESTAMP has no fraction of a second,
+    # and mixing the two text formats breaks the comparisons keyset pagination relies on
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
 
     agent = relationship("User", back_populates="contacts")
     tasks = relationship("Task", back_populates="contact")
@@ -82,6 +97,9 @@ class Contact(Base):
 
 class EmailThread(Base):
     __tablename__ = "email_threads"
+    __table_args__ = (
+        Index("ix_email_threads_agent_last_message", "agent_id", "last_message_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     thread_id = Column(String, unique=True, index=True) # From dataset
@@ -92,11 +110,14 @@ class EmailThread(Base):
 
     contact = relationship("Contact", back_populates="email_threads")
     agent = relationship("User", back_populates="email_threads")
-    messages = relationship("EmailMessage", back_populates="thread")
+    messages = relationship("EmailMessage", back_populates="thread", order_by="EmailMessage.sent_at")
     tasks = relationship("Task", back_populates="source_thread")
 
 class EmailMessage(Base):
     __tablename__ = "email_messages"
+    __table_args__ = (
+        Index("ix_email_messages_thread_sent", "thread_id", "sent_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     thread_id = Column(Integer, ForeignKey("email_threads.id"))
@@ -115,6 +136,10 @@ class EmailMessage(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_agent_status_due", "agent_id", "status", "due_date"),
+        Index("ix_tasks_agent_due", "agent_id", "due_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     agent_id = Column(Integer, ForeignKey("users.id"))
@@ -127,6 +152,7 @@ class Task(Base):
     due_date = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    user_edited_at = Column(DateTime(timezone=True), nullable=True) # Last manual change (API or chat), triggers re-inference
     source_thread_id = Column(Integer, ForeignKey("email_threads.id"), nullable=True)
     source_message_id = Column(Integer, ForeignKey("email_messages.id"), nullable=True)
 
@@ -137,10 +163,51 @@ class Task(Base):
 
 class Embedding(Base):
     __tablename__ = "embeddings"
+    __table_args__ = (
+        Index("ix_embeddings_entity", "entity_type", "entity_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     entity_type = Column(String) # email_message, contact, etc.
     entity_id = Column(Integer)
     embedding = Column(JSON) # Storing as JSON list of floats for simplicity in SQLite
     metadata_json = Column(JSON, nullable=True)
+    partition = Column(String, nullable=True, index=True) # Optional scope, e.g. "<app>/<user>" for memory documents
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True) # sha256 of (model, normalized prompt, generation config)
+    model_name = Column(String)
+    response_text = Column(Text) # Raw text, or serialized Content for ADK model responses
+    created_at = Column(DateTime(timezone=True), index=True)
+    last_accessed_at = Column(DateTime(timezone=True), index=True)
+
+class MemoryDocument(Base):
+    __tablename__ = "memory_documents"
+    __table_args__ = (
+        UniqueConstraint("app_name", "user_id", "session_id", name="uq_memory_documents_session"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    app_name = Column(String, nullable=False)
+    user_id = Column(String, nullable=False) # ADK user id (the agent's User.id as a string)
+    session_id = Column(String, nullable=False) # Memory key, e.g. "contact-<email>"
+    author = Column(String, default="user")
+    text = Column(Text)
+    updated_at = Column(DateTime(timezone=True))
+
+class AgentStats(Base):
+    __tablename__ = "agent_stats"
+
+    agent_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    contacts_total = Column(Integer, default=0)
+    contacts_by_stage = Column(JSON) # {pipeline_stage: count}
+    tasks_by_status = Column(JSON) # {status: count}, all tasks
+    open_tasks_by_priority = Column(JSON) # {priority: count}, OPEN/WAITING_ON_CLIENT tasks only
+    overdue_tasks = Column(Integer, default=0)
+    next_overdue_at = Column(DateTime(timezone=True), nullable=True) # Earliest future due date; overdue_tasks is recounted once it passes
+    unread_threads = Column(Integer, default=0) # Threads whose latest message is incoming
+    updated_at = Column(DateTime(timezone=True))
@@ -1,4 +1,4 @@
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 from app.models.models import UserRole, PipelineStage, TaskType, TaskPriority, TaskStatus, EmailDirection
@@ -52,6 +52,10 @@ class Contact(ContactBase):
     class Config:
         from_attributes = True
 
+class ContactPage(BaseModel):
+    items: List[Contact] = []
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page; None on the last page
+
 # Task
 class TaskBase(BaseModel):
     task_type: TaskType
@@ -85,6 +89,10 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskPage(BaseModel):
+    items: List[Task] = []
+    next_cursor: Optional[str] = None
+
 # Email
 class EmailMessageBase(BaseModel):
     message_id: str
@@ -118,6 +126,23 @@ class EmailThread(EmailThreadBase):
     class Config:
         from_attributes = True
 
+class EmailThreadSummary(EmailThreadBase):
+    # List view of a thread: no message bodies, just the latest one's snippet
+    id: int
+    contact_id: Optional[int] = None
+    contact_name: Optional[str] = None
+    contact_email: Optional[str] = None
+    message_count: int = 0
+    last_snippet: Optional[str] = None
+    last_direction: Optional[EmailDirection] = None
+
+    class Config:
+        from_attributes = True
+
+class EmailThreadPage(BaseModel):
+    items: List[EmailThreadSummary] = []
+    next_cursor: Optional[str] = None
+
 # Chat
 class ChatRequest(BaseModel):
     message: str
@@ -126,3 +151,21 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
     structured: Optional[Any] = None
+
+# Dashboard
+class DashboardSummary(BaseModel):
+    contacts_total: int = 0
+    contacts_by_stage: Dict[str, int] = {}
+    tasks_by_status: Dict[str, int] = {}
+    open_tasks_by_priority: Dict[str, int] = {}
+    overdue_tasks: int = 0
+    unread_threads: int = 0
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Search
+class SearchResults(BaseModel):
+    contacts: List[Contact] = []
+    tasks: List[Task] = []
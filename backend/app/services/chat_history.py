@@ -0,0 +1,103 @@
+import asyncio
+import json
+from typing import List
+from google.adk.events import Event, EventActions
+from app.core import llm
+from app.core.config import settings
+from app.core.database import run_in_db_executor
+
+# Session state key holding the running summary of turns dropped from the history
+SUMMARY_STATE = "chat_summary"
+
+def _event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return " ".join(part.text for part in event.content.parts if part.text and not part.thought).strip()
+
+def _turn_starts(events) -> List[int]:
+    # A turn starts with each message the user typed (tool responses are also user-role, but carry no text)
+    return [i for i, event in enumerate(events) if event.author == "user" and _event_text(event)]
+
+def _transcript(events) -> str:
+    lines = []
+    for event in events:
+        text = _event_text(event)
+        if text:
+            lines.append(f"{'User' if event.author == 'user' else 'Assistant'}: {text}")
+        for call in event.get_function_calls():
+            lines.append(f"Assistant looked up {call.name}({json.dumps(call.args or {}, default=str)})")
+    return "\n".join(lines)
+
+def _summarize(previous_summary: str, transcript: str) -> str:
+    prompt = f"""You maintain a running summary of a conversation between a real estate agent (User)
+and their CRM assistant (Assistant). Update the summary with the new part of the conversation.
+Keep names, contact ids, task titles, dates, decisions and open questions; drop small talk.
+Write at most 200 words of plain prose.
+
+Current summary:
+{previous_summary or "(none)"}
+
+New conversation:
+{transcript}
+
+Updated summary:"""
+    return llm.generate_text(prompt).strip()
+
+async def compact_session(session_service, session) -> bool:
+    """
+    Folds all but the last CHAT_HISTORY_TURNS turns of a chat session into its running
+    summary and deletes the folded events. Runs only once the session holds twice that
+    many turns, so the summary call is paid once every CHAT_HISTORY_TURNS turns.
+    Returns True if the session was compacted.
+    """
+    keep_turns = settings.CHAT_HISTORY_TURNS
+    starts = _turn_starts(session.events)
+    if keep_turns <= 0 or len(starts) <= 2 * keep_turns:
+        return False
+
+    cut = starts[-keep_turns]
+    folded = session.events[:cut]
+    try:
+        summary = await asyncio.to_thread(_summarize, session.state.get(SUMMARY_STATE, ""), _transcript(folded))
+    except Exception as e:
+        # Keep the full history this turn; the token budget still bounds the request
+        print(f"Chat history summarization failed: {e}")
+        return False
+
+    await session_service.append_event(session, Event(
+        invocation_id=Event.new_id(),
+        author="user",
+        actions=EventActions(state_delta={SUMMARY_STATE: summary}),
+    ))
+    await run_in_db_executor(
+        session_service.delete_events, session.app_name, session.user_id, session.id, [event.id for event in folded]
+    )
+    return True
+
+def _estimate_tokens(contents) -> int:
+    # Rough but stable: about 4 characters per token
+    return sum(len(content.model_dump_json(exclude_none=True)) for content in contents) // 4
+
+def bounded_history_before_model_callback(callback_context, llm_request):
+    """
+    ADK before_model_callback for chat: adds the running summary to the system
+    instruction and drops the oldest whole turns while the request is over
+    CHAT_HISTORY_TOKEN_BUDGET. The current turn is always kept.
+    """
+    summary = callback_context.state.get(SUMMARY_STATE)
+    if summary:
+        llm_request.append_instructions([f"Summary of the earlier conversation:\n{summary}"])
+
+    contents = llm_request.contents
+    starts = [
+        i for i, content in enumerate(contents)
+        if content.role == "user" and any(part.text for part in content.parts or [])
+    ]
+    budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+    dropped = 0
+    while dropped < len(starts) - 1 and _estimate_tokens(contents[starts[dropped]:]) > budget:
+        dropped += 1
+    if starts and (dropped or starts[0] > 0):
+        # Also drops anything before the first user turn (e.g. orphaned tool results)
+        llm_request.contents = contents[starts[dropped]:]
+    return None
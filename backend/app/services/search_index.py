@@ -0,0 +1,145 @@
+import re
+from typing import List, Optional
+from sqlalchemy import text, or_
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.models import models
+
+# FTS5 tables over contacts and tasks, using the base tables as external content.
+# Triggers keep them current on every insert/update/delete, whichever code path writes.
+FTS_TABLES = {
+    "contacts_fts": {
+        "content": "contacts",
+        "columns": ["name", "email", "notes", "profile_summary"],
+        "weights": [10.0, 5.0, 1.0, 1.0], # bm25 column weights
+    },
+    "tasks_fts": {
+        "content": "tasks",
+        "columns": ["title", "detailed_description"],
+        "weights": [5.0, 1.0],
+    },
+}
+
+_fts_available: Optional[bool] = None
+
+def _index_ddl(fts_table: str, spec: dict) -> List[str]:
+    content = spec["content"]
+    columns = ", ".join(spec["columns"])
+    new_values = ", ".join(f"new.{c}" for c in spec["columns"])
+    old_values = ", ".join(f"old.{c}" for c in spec["columns"])
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{columns}, content='{content}', content_rowid='id', tokenize='unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {content} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {content} BEGIN {delete_old} END",
+        # Only indexed columns re-index a row; watermark and status updates skip the FTS table
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {columns} ON {content} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+def ensure_search_index(conn: Connection):
+    """
+    Creates the FTS tables and triggers if missing, and builds the index for rows
+    written before it existed. A no-op on databases other than SQLite.
+    Run by the schema migrations.
+    """
+    global _fts_available
+    if conn.dialect.name != "sqlite":
+        _fts_available = False
+        return
+    try:
+        for fts_table, spec in FTS_TABLES.items():
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": fts_table}
+            ).first()
+            for statement in _index_ddl(fts_table, spec):
+                conn.execute(text(statement))
+            if not existed:
+                conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+        _fts_available = True
+    except OperationalError as e:
+        # SQLite built without FTS5: searches fall back to LIKE scans
+        print(f"Full-text search index unavailable: {e}")
+        _fts_available = False
+
+def _fts_enabled(db: Session) -> bool:
+    global _fts_available
+    if _fts_available is None:
+        bind = db.get_bind()
+        _fts_available = bind.dialect.name == "sqlite" and db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'")
+        ).first() is not None
+    return _fts_available
+
+def to_fts_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 query: every word must match, as a prefix.
+    Words are quoted, so FTS syntax in user input is treated as plain text.
+    """
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+def _ranked_ids(db: Session, fts_table: str, fts_query: str, owner_sql: str, agent_user_id: int, limit: int) -> List[int]:
+    spec = FTS_TABLES[fts_table]
+    weights = ", ".join(str(w) for w in spec["weights"])
+    rows = db.execute(
+        text(
+            f"SELECT {fts_table}.rowid FROM {fts_table} "
+            f"JOIN {spec['content']} ON {spec['content']}.id = {fts_table}.rowid "
+            f"WHERE {fts_table} MATCH :query AND {owner_sql} "
+            f"ORDER BY bm25({fts_table}, {weights}) LIMIT :limit"
+        ),
+        {"query": fts_query, "agent_id": agent_user_id, "limit": limit}
+    )
+    return [row[0] for row in rows]
+
+def _in_rank_order(items, ranked_ids: List[int]):
+    by_id = {item.id: item for item in items}
+    return [by_id[i] for i in ranked_ids if i in by_id]
+
+def search_contacts(db: Session, agent_user_id: int, query: str, limit: int = 20) -> List[models.Contact]:
+    """
+    The agent's contacts matching the query by name, email, notes or profile summary, best match first.
+    """
+    if _fts_enabled(db):
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+        ranked = _ranked_ids(db, "contacts_fts", fts_query, "contacts.agent_id = :agent_id", agent_user_id, limit)
+        contacts = db.query(models.Contact).filter(models.Contact.id.in_(ranked)).all() if ranked else []
+        return _in_rank_order(contacts, ranked)
+
+    pattern = f"%{query}%"
+    return db.query(models.Contact).filter(
+        models.Contact.agent_id == agent_user_id,
+        or_(
+            models.Contact.name.ilike(pattern),
+            models.Contact.email.ilike(pattern),
+            models.Contact.notes.ilike(pattern),
+            models.Contact.profile_summary.ilike(pattern),
+        )
+    ).order_by(models.Contact.name).limit(limit).all()
+
+def search_tasks(db: Session, agent_user_id: int, query: str, limit: int = 20) -> List[models.Task]:
+    """
+    The agent's tasks matching the query by title or description, best match first.
+    """
+    if _fts_enabled(db):
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+        ranked = _ranked_ids(db, "tasks_fts", fts_query, "tasks.agent_id = :agent_id", agent_user_id, limit)
+        tasks = db.query(models.Task).filter(models.Task.id.in_(ranked)).all() if ranked else []
+        return _in_rank_order(tasks, ranked)
+
+    pattern = f"%{query}%"
+    return db.query(models.Task).filter(
+        models.Task.agent_id == agent_user_id,
+        or_(models.Task.title.ilike(pattern), models.Task.detailed_description.ilike(pattern))
+    ).order_by(models.Task.due_date).limit(limit).all()
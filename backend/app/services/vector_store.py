@@ -42,9 +42,42 @@ class VectorStore:
         
         self.db.commit()
 
-    def search(self, query: str, entity_type: Optional[str] = None, top_k: int = 5) -> List[Dict[str, Any]]:
+    def upsert_embeddings(self, entity_type: str, texts: Dict[int, str], partition: Optional[str] = None) -> bool:
+        """
+        Embeds several entities with batched API calls and stores them in one commit.
+        Returns False if the embeddings could not be generated.
+        """
+        if not texts:
+            return True
+        entity_ids = list(texts)
+        try:
+            vectors = llm.generate_embeddings([texts[entity_id] for entity_id in entity_ids])
+        except Exception as e:
+            print(f"Error generating embeddings: {e}")
+            return False
+
+        existing = {
+            row.entity_id: row
+            for row in self.db.query(models.Embedding).filter(
+                models.Embedding.entity_type == entity_type,
+                models.Embedding.entity_id.in_(entity_ids)
+            )
+        }
+        for entity_id, vector in zip(entity_ids, vectors):
+            row = existing.get(entity_id)
+            if row is None:
+                row = models.Embedding(entity_type=entity_type, entity_id=entity_id)
+                self.db.add(row)
+            row.embedding = json.dumps(vector)
+            row.partition = partition
+
+        self.db.commit()
+        return True
+
+    def search(self, query: str, entity_type: Optional[str] = None, top_k: int = 5, partition: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Searches for similar entities using cosine similarity.
+        With a partition, only embeddings stored under that partition are compared.
         """
         try:
             query_vector = llm.generate_embedding(query)
@@ -55,6 +88,8 @@ class VectorStore:
         filters = []
         if entity_type:
             filters.append(models.Embedding.entity_type == entity_type)
+        if partition is not None:
+            filters.append(models.Embedding.partition == partition)
             
         candidates = self.db.query(models.Embedding).filter(*filters).all()
         
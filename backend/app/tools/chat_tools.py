@@ -1,42 +1,110 @@
+import json
 from typing import List, Dict, Any, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models import models
 from app.core.database import SessionLocal
 from app.services.vector_store import VectorStore
+from app.services import search_index
+from app.tools.stats_tools import CLOSED_TASK_STATUSES, get_agent_stats
 
 def get_db_session():
     return SessionLocal()
 
-def search_contacts_tool(query: str, agent_user_id: int) -> List[Dict[str, Any]]:
+# Session state key of the memoized chat tool results: {"version", "invocation_id", "results"}
+TOOL_CACHE_STATE = "tool_cache"
+
+def get_data_version(agent_user_id: int) -> int:
+    """
+    Current version of the agent's CRM data; cached tool results from an older version are stale.
+    """
+    db = get_db_session()
+    try:
+        version = db.query(models.User.data_version).filter(models.User.id == agent_user_id).scalar()
+        return version or 0
+    finally:
+        db.close()
+
+def bump_data_version(db: Session, agent_user_id: int):
+    """
+    Marks the agent's data as changed. Runs in the caller's transaction, so
+    the bump commits (or rolls back) together with the write it describes.
+    """
+    db.query(models.User).filter(models.User.id == agent_user_id).update(
+        {models.User.data_version: func.coalesce(models.User.data_version, 0) + 1},
+        synchronize_session=False
+    )
+
+def bump_data_version_tool(agent_user_id: int):
+    """
+    Standalone bump, for writers that commit through several tools (e.g. a sync stage).
+    """
+    db = get_db_session()
+    try:
+        bump_data_version(db, agent_user_id)
+        db.commit()
+    finally:
+        db.close()
+
+def tool_cache_key(tool_name: str, *args) -> str:
+    """
+    Key of a chat tool result for these arguments within the memoized results.
     """
-    Searches contacts by name or email.
+    return f"{tool_name}:{json.dumps(args, sort_keys=True, default=str)}"
+
+def to_cacheable(result: Any) -> Any:
+    """
+    Converts a tool result to plain JSON types (dates become ISO strings) so it can live in session state.
+    """
+    return json.loads(json.dumps(result, default=str))
+
+def search_contacts_tool(query: str, agent_user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Searches contacts by name, email, notes or profile summary (full-text index, best match first).
     """
     db = get_db_session()
     try:
-        contacts = db.query(models.Contact).filter(
-            models.Contact.agent_id == agent_user_id,
-            (models.Contact.name.ilike(f"%{query}%")) | (models.Contact.email.ilike(f"%{query}%"))
-        ).all()
+        contacts = search_index.search_contacts(db, agent_user_id, query, limit=limit)
         
         return [{"id": c.id, "name": c.name, "email": c.email, "stage": c.pipeline_stage} for c in contacts]
     finally:
         db.close()
 
-def search_tasks_tool(query: str, agent_user_id: int) -> List[Dict[str, Any]]:
+def search_tasks_tool(query: str, agent_user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
     """
-    Searches tasks by title.
+    Searches tasks by title or description (full-text index, best match first).
     """
     db = get_db_session()
     try:
-        tasks = db.query(models.Task).filter(
-            models.Task.agent_id == agent_user_id,
-            models.Task.title.ilike(f"%{query}%")
-        ).all()
+        tasks = search_index.search_tasks(db, agent_user_id, query, limit=limit)
         
         return [{"id": t.id, "title": t.title, "status": t.status, "due_date": t.due_date} for t in tasks]
     finally:
         db.close()
 
+def count_contacts_tool(agent_user_id: int) -> int:
+    """
+    Counts the agent's contacts (from the maintained dashboard counters).
+    """
+    db = get_db_session()
+    try:
+        return get_agent_stats(db, agent_user_id).contacts_total or 0
+    finally:
+        db.close()
+
+def count_tasks_tool(agent_user_id: int) -> int:
+    """
+    Counts the agent's open tasks (from the maintained dashboard counters);
+    done and canceled tasks are left out.
+    """
+    db = get_db_session()
+    try:
+        tasks_by_status = get_agent_stats(db, agent_user_id).tasks_by_status or {}
+        closed = {status.value for status in CLOSED_TASK_STATUSES}
+        return sum(count for status, count in tasks_by_status.items() if status not in closed)
+    finally:
+        db.close()
+
 def get_contact_profile_tool(contact_id: int) -> Dict[str, Any]:
     """
     Gets full profile for a contact.
@@ -1,33 +1,37 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models import models
-from app.core.database import SessionLocal
+from app.core.database import WriteSessionLocal
+from app.tools.stats_tools import apply_contact_change, contact_counters
 
 def get_db_session():
-    return SessionLocal()
+    # Sync pipeline writes go through the single-writer engine
+    return WriteSessionLocal()
 
-def get_contact_emails_tool(contact_id: int) -> List[Dict[str, Any]]:
+def get_contact_emails_tool(contact_id: int, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
     """
-    Fetches all emails exchanged with a contact.
+    Fetches all emails exchanged with a contact, oldest first.
+    If `since` is given, only messages sent after it are returned.
     """
     db = get_db_session()
     try:
-        contact = db.query(models.Contact).filter(models.Contact.id == contact_id).first()
-        if not contact:
-            return []
-            
+        query = db.query(models.EmailMessage).join(models.EmailThread).filter(
+            models.EmailThread.contact_id == contact_id
+        )
+        if since is not None:
+            query = query.filter(models.EmailMessage.sent_at > since)
+
         emails = []
-        # Iterate through threads to get messages
-        for thread in contact.email_threads:
-            for msg in thread.messages:
-                emails.append({
-                    "from": msg.from_email,
-                    "to": msg.to_emails,
-                    "subject": msg.subject,
-                    "body_text": msg.body_text,
-                    "sent_at": msg.sent_at.isoformat() if msg.sent_at else None,
-                    "direction": msg.direction
-                })
+        for msg in query.order_by(models.EmailMessage.sent_at).all():
+            emails.append({
+                "from": msg.from_email,
+                "to": msg.to_emails,
+                "subject": msg.subject,
+                "body_text": msg.body_text,
+                "sent_at": msg.sent_at.isoformat() if msg.sent_at else None,
+                "direction": msg.direction
+            })
         return emails
     finally:
         db.close()
@@ -57,10 +61,28 @@ def update_contact_pipeline_stage_tool(contact_id: int, stage: str):
         if contact:
             # Validate stage against enum
             if stage in models.PipelineStage.__members__:
+                before = contact_counters(contact)
                 contact.pipeline_stage = stage
                 db.add(contact)
+                apply_contact_change(db, contact.agent_id, before, contact_counters(contact))
                 db.commit()
             else:
                 print(f"Invalid stage: {stage}")
     finally:
         db.close()
+
+def update_contact_history_tool(contact_id: int, history_summary: str, watermark: Optional[datetime]):
+    """
+    Stores the rolling history summary and the sent_at of the newest message it covers.
+    """
+    db = get_db_session()
+    try:
+        contact = db.query(models.Contact).filter(models.Contact.id == contact_id).first()
+        if contact:
+            contact.history_summary = history_summary
+            if watermark is not None:
+                contact.history_watermark = watermark
+            db.add(contact)
+            db.commit()
+    finally:
+        db.close()
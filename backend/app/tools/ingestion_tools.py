@@ -3,12 +3,13 @@ from sqlalchemy.orm import Session
 from app.models import models
 from app.services.gmail_service import GmailService
 from app.services.vector_store import VectorStore
-from app.core.database import SessionLocal
+from app.core.database import WriteSessionLocal
 from datetime import datetime, timezone
 
 # Helper to get DB session
 def get_db_session():
-    return SessionLocal()
+    # Sync pipeline writes go through the single-writer engine
+    return WriteSessionLocal()
 
 def load_email_dataset_tool() -> List[Dict[str, Any]]:
     """
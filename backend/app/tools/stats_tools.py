@@ -0,0 +1,185 @@
+import enum
+from typing import Dict, Optional, Tuple
+from datetime import datetime, timezone
+from sqlalchemy import func, and_
+from sqlalchemy.orm import Session
+from app.models import models
+from app.core.database import SessionLocal
+
+# Tasks that still need doing; only these count as overdue
+ACTIVE_TASK_STATUSES = (models.TaskStatus.OPEN, models.TaskStatus.WAITING_ON_CLIENT)
+CLOSED_TASK_STATUSES = (models.TaskStatus.DONE, models.TaskStatus.CANCELED)
+
+_ACTIVE_STATUS_NAMES = {status.value for status in ACTIVE_TASK_STATUSES}
+
+def get_db_session():
+    return SessionLocal()
+
+def _name(value) -> str:
+    # Writers may hold an enum member or its string; counters are keyed by the string
+    if value is None:
+        return "UNKNOWN"
+    return value.value if isinstance(value, enum.Enum) else str(value)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _count_by(db: Session, column, *filters) -> Dict[str, int]:
+    rows = db.query(column, func.count()).filter(*filters).group_by(column).all()
+    return {_name(key): count for key, count in rows}
+
+def _refresh_overdue(db: Session, stats: models.AgentStats, agent_user_id: int, now: datetime):
+    active = (
+        models.Task.agent_id == agent_user_id,
+        models.Task.status.in_(ACTIVE_TASK_STATUSES),
+        models.Task.due_date.isnot(None),
+    )
+    stats.overdue_tasks = db.query(func.count(models.Task.id)).filter(*active, models.Task.due_date < now).scalar()
+    # The overdue count only goes stale once this moment passes
+    stats.next_overdue_at = db.query(func.min(models.Task.due_date)).filter(*active, models.Task.due_date >= now).scalar()
+
+def _count_awaiting_reply(db: Session, agent_user_id: int) -> int:
+    # The dataset has no UNREAD label, so a thread counts as unread when its latest message is incoming
+    latest = (
+        db.query(models.EmailMessage.thread_id, func.max(models.EmailMessage.sent_at).label("latest_at"))
+        .join(models.EmailThread, models.EmailThread.id == models.EmailMessage.thread_id)
+        .filter(models.EmailThread.agent_id == agent_user_id)
+        .group_by(models.EmailMessage.thread_id)
+        .subquery()
+    )
+    return db.query(func.count(func.distinct(models.EmailMessage.thread_id))).join(
+        latest,
+        and_(
+            models.EmailMessage.thread_id == latest.c.thread_id,
+            models.EmailMessage.sent_at == latest.c.latest_at,
+        )
+    ).filter(models.EmailMessage.direction == models.EmailDirection.INCOMING).scalar()
+
+def refresh_agent_stats(db: Session, agent_user_id: int) -> models.AgentStats:
+    """
+    Recounts all of the agent's dashboard counters. Writers that change a single
+    task or contact apply a delta instead (apply_task_change / apply_contact_change);
+    this is for the first build and for bulk writers like the ingestion stage.
+    """
+    # SessionLocal doesn't autoflush; the counts must see the caller's pending changes
+    db.flush()
+    now = datetime.utcnow()
+    stats = db.get(models.AgentStats, agent_user_id)
+    if stats is None:
+        stats = models.AgentStats(agent_id=agent_user_id)
+        db.add(stats)
+
+    stats.contacts_by_stage = _count_by(db, models.Contact.pipeline_stage, models.Contact.agent_id == agent_user_id)
+    stats.contacts_total = sum(stats.contacts_by_stage.values())
+    stats.tasks_by_status = _count_by(db, models.Task.status, models.Task.agent_id == agent_user_id)
+    stats.open_tasks_by_priority = _count_by(
+        db, models.Task.priority,
+        models.Task.agent_id == agent_user_id,
+        models.Task.status.in_(ACTIVE_TASK_STATUSES)
+    )
+    _refresh_overdue(db, stats, agent_user_id, now)
+    stats.unread_threads = _count_awaiting_reply(db, agent_user_id)
+    stats.updated_at = now
+    return stats
+
+TaskCounters = Optional[Tuple[str, str, Optional[datetime]]]
+ContactCounters = Optional[Tuple[str]]
+
+def task_counters(task: Optional[models.Task]) -> TaskCounters:
+    """
+    The fields of a task the counters depend on; None for a task that doesn't exist.
+    """
+    if task is None:
+        return None
+    return _name(task.status), _name(task.priority), _naive_utc(task.due_date)
+
+def contact_counters(contact: Optional[models.Contact]) -> ContactCounters:
+    """
+    The fields of a contact the counters depend on; None for a contact that doesn't exist.
+    """
+    if contact is None:
+        return None
+    return (_name(contact.pipeline_stage),)
+
+def _adjust(counts: Optional[Dict[str, int]], key: str, delta: int) -> Dict[str, int]:
+    # A new dict, so the JSON column sees the change
+    counts = dict(counts or {})
+    counts[key] = counts.get(key, 0) + delta
+    if counts[key] <= 0:
+        del counts[key]
+    return counts
+
+def apply_task_change(db: Session, agent_user_id: int, before: TaskCounters, after: TaskCounters):
+    """
+    Moves one task's contribution to the counters from `before` to `after` (task_counters
+    taken around the write). Runs in the caller's transaction, like the write itself.
+    """
+    if before == after:
+        return
+    stats = db.get(models.AgentStats, agent_user_id)
+    if stats is None:
+        # Not built yet; the first read counts everything, this write included
+        return
+    now = datetime.utcnow()
+    for counters, sign in ((before, -1), (after, 1)):
+        if counters is None:
+            continue
+        status, priority, due_date = counters
+        stats.tasks_by_status = _adjust(stats.tasks_by_status, status, sign)
+        if status not in _ACTIVE_STATUS_NAMES:
+            continue
+        stats.open_tasks_by_priority = _adjust(stats.open_tasks_by_priority, priority, sign)
+        if due_date is None:
+            continue
+        if due_date < now:
+            stats.overdue_tasks = (stats.overdue_tasks or 0) + sign
+        elif sign > 0 and (stats.next_overdue_at is None or due_date < stats.next_overdue_at):
+            # Only ever moved earlier: if the earliest task goes away, the next read
+            # just recounts overdue tasks a little sooner than it had to
+            stats.next_overdue_at = due_date
+    stats.updated_at = now
+
+def apply_contact_change(db: Session, agent_user_id: int, before: ContactCounters, after: ContactCounters):
+    """
+    Moves one contact's contribution to the counters from `before` to `after`
+    (contact_counters taken around the write), in the caller's transaction.
+    """
+    if before == after:
+        return
+    stats = db.get(models.AgentStats, agent_user_id)
+    if stats is None:
+        return
+    for counters, sign in ((before, -1), (after, 1)):
+        if counters is None:
+            continue
+        stats.contacts_by_stage = _adjust(stats.contacts_by_stage, counters[0], sign)
+        stats.contacts_total = (stats.contacts_total or 0) + sign
+    stats.updated_at = datetime.utcnow()
+
+def refresh_agent_stats_tool(agent_user_id: int):
+    """
+    Standalone refresh, for writers that commit through several tools (e.g. a sync stage).
+    """
+    db = get_db_session()
+    try:
+        refresh_agent_stats(db, agent_user_id)
+        db.commit()
+    finally:
+        db.close()
+
+def get_agent_stats(db: Session, agent_user_id: int) -> models.AgentStats:
+    """
+    Returns the agent's counters, building them on first use and
+    recounting overdue tasks only when a due date has passed since the last count.
+    """
+    stats = db.get(models.AgentStats, agent_user_id)
+    now = datetime.utcnow()
+    if stats is None:
+        stats = refresh_agent_stats(db, agent_user_id)
+        db.commit()
+    elif stats.next_overdue_at is not None and stats.next_overdue_at <= now:
+        _refresh_overdue(db, stats, agent_user_id, now)
+        db.commit()
+    return stats
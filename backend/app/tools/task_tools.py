@@ -1,12 +1,32 @@
 from typing import List, Dict, Any, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
+from difflib import SequenceMatcher
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from app.models import models
 from app.core.database import SessionLocal
+from app.tools.chat_tools import bump_data_version
+from app.tools.stats_tools import CLOSED_TASK_STATUSES, apply_task_change, task_counters
 
 def get_db_session():
     return SessionLocal()
 
+def overdue_condition(now: datetime):
+    """
+    SQL condition for a task that is past due; finished tasks are never overdue.
+    """
+    return and_(
+        models.Task.due_date.isnot(None),
+        models.Task.due_date < now,
+        models.Task.status.notin_(CLOSED_TASK_STATUSES),
+    )
+
+def is_overdue(task: models.Task, now: datetime) -> bool:
+    """
+    overdue_condition for a task already loaded.
+    """
+    return bool(task.due_date and task.status not in CLOSED_TASK_STATUSES and task.due_date < now)
+
 def list_emails_for_thread_tool(thread_id: int) -> List[Dict[str, Any]]:
     """
     Fetches emails for a specific thread.
@@ -32,7 +52,7 @@ def list_emails_for_thread_tool(thread_id: int) -> List[Dict[str, Any]]:
 
 def upsert_task_tool(task_data: Dict[str, Any], agent_user_id: int) -> int:
     """
-    Creates or updates a task.
+    Creates or updates a task on the user's behalf (marked as a manual edit).
     """
     db = get_db_session()
     try:
@@ -50,6 +70,7 @@ def upsert_task_tool(task_data: Dict[str, Any], agent_user_id: int) -> int:
                 models.Task.task_type == task_data.get("task_type")
             ).first()
             
+        before = task_counters(task)
         if not task:
             task = models.Task(
                 agent_id=agent_user_id,
@@ -70,6 +91,9 @@ def upsert_task_tool(task_data: Dict[str, Any], agent_user_id: int) -> int:
             if "due_date" in task_data: task.due_date = task_data["due_date"]
             if "priority" in task_data: task.priority = task_data["priority"]
             if "detailed_description" in task_data: task.detailed_description = task_data["detailed_description"]
+        task.user_edited_at = datetime.now(timezone.utc)
+        bump_data_version(db, agent_user_id)
+        apply_task_change(db, agent_user_id, before, task_counters(task))
             
         db.commit()
         db.refresh(task)
@@ -77,6 +101,157 @@ def upsert_task_tool(task_data: Dict[str, Any], agent_user_id: int) -> int:
     finally:
         db.close()
 
+TITLE_MATCH_THRESHOLD = 0.75
+
+def _normalize_inferred_task(task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Validates one task returned by the task agent. Returns None if it is unusable.
+    """
+    if not isinstance(task_data, dict):
+        return None
+    task_type = task_data.get("task_type")
+    if task_type not in models.TaskType.__members__:
+        return None
+    priority = task_data.get("priority")
+    status = task_data.get("status")
+    try:
+        due_in_days = int(task_data.get("due_in_days", 7))
+    except (TypeError, ValueError):
+        due_in_days = 7
+    return {
+        "id": task_data.get("id"),
+        "task_type": models.TaskType[task_type],
+        "title": task_data.get("title") or "Untitled Task",
+        "detailed_description": task_data.get("description") or "",
+        "priority": models.TaskPriority[priority] if priority in models.TaskPriority.__members__ else models.TaskPriority.MEDIUM,
+        "status": models.TaskStatus[status] if status in models.TaskStatus.__members__ else models.TaskStatus.OPEN,
+        "due_in_days": due_in_days,
+    }
+
+def _title_similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, (a or "").lower().strip(), (b or "").lower().strip()).ratio()
+
+def reconcile_contact_tasks(
+    db: Session,
+    contact: models.Contact,
+    inferred_tasks: List[Dict[str, Any]],
+    agent_user_id: int,
+    source_thread_id: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Applies the task agent's complete task list for a contact as a diff against
+    its current tasks, inside the caller's transaction.
+
+    Returned tasks are matched to existing ones by id, then by task type plus
+    title similarity. Matches are updated only where fields changed, unmatched
+    returned tasks are inserted, and unmatched open tasks are canceled.
+    Completed tasks keep their status and completed_at, and existing due dates
+    are kept so they don't drift forward on every sync. Tasks the user created or
+    edited (user_edited_at set, via the API or chat) are left exactly as they are:
+    a match still claims them, so no duplicate is inserted, but nothing is overwritten
+    and they are never canceled.
+    """
+    existing = db.query(models.Task).filter(
+        models.Task.contact_id == contact.id,
+        models.Task.status != models.TaskStatus.CANCELED
+    ).all()
+    existing_by_id = {t.id: t for t in existing}
+    unmatched_existing = set(existing_by_id)
+
+    normalized = [n for n in (_normalize_inferred_task(t) for t in inferred_tasks) if n]
+    matches = []
+    unmatched_inferred = []
+
+    # 1. Explicit ids the model echoed back
+    for item in normalized:
+        task_id = item["id"]
+        if isinstance(task_id, int) and task_id in unmatched_existing:
+            unmatched_existing.discard(task_id)
+            matches.append((existing_by_id[task_id], item))
+        else:
+            unmatched_inferred.append(item)
+
+    # 2. Same type and a similar title
+    new_items = []
+    for item in unmatched_inferred:
+        best, best_score = None, TITLE_MATCH_THRESHOLD
+        for task_id in unmatched_existing:
+            task = existing_by_id[task_id]
+            if task.task_type != item["task_type"]:
+                continue
+            score = _title_similarity(task.title, item["title"])
+            if score >= best_score:
+                best, best_score = task, score
+        if best is not None:
+            unmatched_existing.discard(best.id)
+            matches.append((best, item))
+        else:
+            new_items.append(item)
+
+    now = datetime.now(timezone.utc)
+    counts = {"inserted": 0, "updated": 0, "canceled": 0, "unchanged": 0}
+
+    for task, item in matches:
+        if task.user_edited_at is not None:
+            counts["unchanged"] += 1
+            continue
+        changes = {
+            "task_type": item["task_type"],
+            "title": item["title"],
+            "detailed_description": item["detailed_description"],
+            "priority": item["priority"],
+        }
+        # A completion (by the user or an earlier run) is never reopened
+        if task.status != models.TaskStatus.DONE:
+            changes["status"] = item["status"]
+        if task.due_date is None:
+            changes["due_date"] = now + timedelta(days=item["due_in_days"])
+
+        before = task_counters(task)
+        changed = False
+        for field, value in changes.items():
+            if getattr(task, field) != value:
+                setattr(task, field, value)
+                changed = True
+        if task.status == models.TaskStatus.DONE and task.completed_at is None:
+            task.completed_at = now
+            changed = True
+        apply_task_change(db, agent_user_id, before, task_counters(task))
+        counts["updated" if changed else "unchanged"] += 1
+
+    for item in new_items:
+        # Nothing to track for a task that is already finished
+        if item["status"] in (models.TaskStatus.DONE, models.TaskStatus.CANCELED):
+            continue
+        task = models.Task(
+            agent_id=agent_user_id,
+            contact_id=contact.id,
+            task_type=item["task_type"],
+            title=item["title"],
+            detailed_description=item["detailed_description"],
+            priority=item["priority"],
+            status=item["status"],
+            due_date=now + timedelta(days=item["due_in_days"]),
+            source_thread_id=source_thread_id
+        )
+        db.add(task)
+        apply_task_change(db, agent_user_id, None, task_counters(task))
+        counts["inserted"] += 1
+
+    for task_id in unmatched_existing:
+        task = existing_by_id[task_id]
+        if task.user_edited_at is None and task.status in (models.TaskStatus.OPEN, models.TaskStatus.WAITING_ON_CLIENT):
+            before = task_counters(task)
+            task.status = models.TaskStatus.CANCELED
+            apply_task_change(db, agent_user_id, before, task_counters(task))
+            counts["canceled"] += 1
+        else:
+            counts["unchanged"] += 1
+
+    if counts["inserted"] or counts["updated"] or counts["canceled"]:
+        bump_data_version(db, agent_user_id)
+    return counts
+
 def compute_daily_agenda_tool(agent_user_id: int, target_date: date = None) -> List[Dict[str, Any]]:
     """
     Computes the agenda for the given date.
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark of chat turn setup: the Python work done before the model is called.
+
+Compares rebuilding the closure tools, ChatAssistant and Runner on every turn
+(the previous behavior) with the shared runner from get_chat_runner().
+Run from backend/:
+
+    python -m benchmarks.chat_turn_setup
+"""
+import time
+from typing import Optional
+from google.adk import Runner
+from google.adk.tools import FunctionTool
+from app.agents.chat_agent import APP_NAME, CHAT_TOOLS, get_chat_runner
+from app.core.adk import session_service, memory_service
+from agents.RealEstateCopilot.chat_assistant import ChatAssistant
+
+TURNS = 200
+
+def per_turn_setup(agent_user_id: int):
+    # Mirrors the old CoachChatAgent.run: fresh closures, agent and runner,
+    # and declarations re-parsed for the model request
+    def search_contacts(query: str):
+        """Searches contacts by name or email."""
+    def search_tasks(query: str):
+        """Searches tasks by title."""
+    def get_contact_profile(contact_id: int):
+        """Gets detailed profile for a specific contact ID."""
+    def search_emails(query: str):
+        """Semantic search over email history."""
+    def count_contacts():
+        """Counts total contacts."""
+    def count_tasks():
+        """Counts total tasks."""
+    def create_task(title: str, contact_id: Optional[int] = None, due_in_days: int = 3, priority: str = "MEDIUM"):
+        """Creates a new task. Always try to find contact_id first if for a specific person."""
+
+    tools = [search_contacts, search_tasks, get_contact_profile, search_emails, count_contacts, count_tasks, create_task]
+    agent = ChatAssistant(tools=tools)
+    Runner(agent=agent, app_name=APP_NAME, session_service=session_service, memory_service=memory_service)
+    return [FunctionTool(tool)._get_declaration() for tool in tools]
+
+def shared_setup(agent_user_id: int):
+    get_chat_runner()
+    return [tool._get_declaration() for tool in CHAT_TOOLS]
+
+def measure(setup) -> float:
+    setup(1) # Warm up imports and caches
+    start = time.perf_counter()
+    for turn in range(TURNS):
+        setup(turn)
+    return (time.perf_counter() - start) / TURNS * 1000
+
+if __name__ == "__main__":
+    before = measure(per_turn_setup)
+    after = measure(shared_setup)
+    print(f"Per-turn agent/runner/tool setup: {before:.3f} ms")
+    print(f"Shared runner, cached declarations: {after:.3f} ms")
+    print(f"Speedup: {before / after:.0f}x")
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings are read when app modules are imported, so point every database at a
+# throwaway directory before any test imports them
+_tmp_dir = tempfile.mkdtemp(prefix="real_estate_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/app.db"
+os.environ["ADK_SESSION_DB_URL"] = f"sqlite:///{_tmp_dir}/adk_sessions.db"
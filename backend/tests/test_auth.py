@@ -0,0 +1,35 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core import migrations, security
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.main import app
+from app.models import models
+
+@pytest.fixture(scope="module")
+def client():
+    migrations.run_migrations(engine)
+    db = SessionLocal()
+    try:
+        db.add(models.User(
+            email="login@example.com",
+            hashed_password=security.get_password_hash("secret", settings.BCRYPT_ROUNDS),
+        ))
+        db.commit()
+    finally:
+        db.close()
+    return TestClient(app)
+
+def _login(client, email, password):
+    return client.post(f"{settings.API_V1_STR}/auth/login", data={"username": email, "password": password})
+
+def test_wrong_case_email_does_not_block_the_correct_login(client):
+    assert _login(client, "Login@Example.com", "secret").status_code == 400
+    response = _login(client, "login@example.com", "secret")
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+def test_repeated_bad_password_is_remembered(client):
+    assert _login(client, "login@example.com", "wrong").status_code == 400
+    assert security.login_failures.is_recent_failure("login@example.com", "wrong")
+    assert not security.login_failures.is_recent_failure("login@example.com", "secret")
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.api.endpoints import contacts, tasks, threads
+from app.core import llm, migrations
+from app.core.database import SessionLocal, engine
+from app.models import models
+from app.services.vector_store import VectorStore
+from app.tools import ingestion_tools
+
+@pytest.fixture(scope="module")
+def agent():
+    migrations.run_migrations(engine)
+    db = SessionLocal()
+    try:
+        user = models.User(email="agent@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        now = datetime.utcnow()
+        for i in range(3):
+            contact = models.Contact(agent_id=user.id, name=f"Client {i}", email=f"client{i}@example.com")
+            db.add(contact)
+            db.flush()
+            thread = models.EmailThread(
+                agent_id=user.id, contact_id=contact.id, thread_id=f"t{i}",
+                subject=f"Subject {i}", last_message_at=now - timedelta(hours=i),
+            )
+            db.add(thread)
+            db.flush()
+            for j in range(2):
+                db.add(models.EmailMessage(
+                    thread_id=thread.id, message_id=f"m{i}-{j}", from_email=contact.email,
+                    subject=thread.subject, body_text="Hello", direction=models.EmailDirection.INCOMING,
+                    sent_at=now - timedelta(hours=i, minutes=j),
+                ))
+            db.add(models.Task(
+                agent_id=user.id, contact_id=contact.id, task_type=list(models.TaskType)[0],
+                title=f"Task {i}", due_date=now + timedelta(days=i - 1),
+            ))
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+@contextmanager
+def captured_selects():
+    """
+    Collects the SELECT statements (and their parameters) run on any engine.
+    """
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+def assert_plans_use(statements, table, *index_names):
+    """
+    Every captured statement reading `table` searches one of the indexes instead of scanning it.
+    """
+    checked = 0
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if f"FROM {table}" not in statement:
+                continue
+            plan = migrations.explain(conn, statement, parameters)
+            assert migrations.uses_index(plan, index_names), f"Expected {' or '.join(index_names)}, got: {plan}"
+            assert f"SCAN {table} " not in f"{plan} ", plan
+            checked += 1
+    assert checked, f"No query on {table} was run"
+
+def test_task_list_pages_use_due_date_index(agent):
+    db = SessionLocal()
+    try:
+        with captured_selects() as statements:
+            page = tasks.read_tasks(
+                db=db, cursor=None, limit=2, status=None, priority=None,
+                contact_id=None, overdue=None, current_user=agent,
+            )
+            tasks.read_tasks(
+                db=db, cursor=page["next_cursor"], limit=2, status=None, priority=None,
+                contact_id=None, overdue=True, current_user=agent,
+            )
+    finally:
+        db.close()
+    assert page["next_cursor"]
+    assert_plans_use(statements, "tasks", "ix_tasks_agent_due", "ix_tasks_agent_status_due")
+
+def test_thread_list_uses_last_message_and_sent_at_indexes(agent):
+    db = SessionLocal()
+    try:
+        with captured_selects() as statements:
+            page = threads.read_threads(db=db, cursor=None, limit=2, current_user=agent)
+            threads.read_threads(db=db, cursor=page["next_cursor"], limit=2, current_user=agent)
+    finally:
+        db.close()
+    assert_plans_use(statements, "email_threads", "ix_email_threads_agent_last_message")
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = migrations.explain(conn, statement, parameters)
+            assert migrations.uses_index(plan, ["ix_email_messages_thread_sent"]), plan
+
+def test_thread_detail_loads_messages_by_index(agent):
+    db = SessionLocal()
+    try:
+        thread_id = db.query(models.EmailThread.id).filter(models.EmailThread.agent_id == agent.id).first()[0]
+        with captured_selects() as statements:
+            threads.read_thread(thread_id=thread_id, db=db, current_user=agent)
+    finally:
+        db.close()
+    assert_plans_use(statements, "email_messages", "ix_email_messages_thread_sent")
+
+def test_contact_list_uses_updated_at_index(agent):
+    db = SessionLocal()
+    try:
+        with captured_selects() as statements:
+            page = contacts.read_contacts(db=db, cursor=None, limit=2, current_user=agent)
+            contacts.read_contacts(db=db, cursor=page["next_cursor"], limit=2, current_user=agent)
+    finally:
+        db.close()
+    assert_plans_use(statements, "contacts", "ix_contacts_agent_updated")
+
+def test_ingestion_contact_lookup_uses_unique_index(agent):
+    with captured_selects() as statements:
+        ingestion_tools.upsert_contact_tool({"email": "client0@example.com", "name": "Client 0"}, agent.id)
+    assert_plans_use(statements, "contacts", "uq_contacts_agent_email")
+
+def test_embedding_upsert_looks_up_by_entity(agent, monkeypatch):
+    monkeypatch.setattr(llm, "generate_embeddings", lambda texts: [[1.0, 0.0] for _ in texts])
+    db = SessionLocal()
+    try:
+        with captured_selects() as statements:
+            assert VectorStore(db).upsert_embeddings("email_message", {1: "Hello", 2: "Hello"})
+    finally:
+        db.close()
+    assert_plans_use(statements, "embeddings", "ix_embeddings_entity")
+
+def test_add_columns_skips_columns_added_by_another_worker(agent, monkeypatch):
+    # Every column already exists; an inspector read before another worker's ALTER sees none
+    class StaleInspector:
+        def get_columns(self, table):
+            return []
+    monkeypatch.setattr(migrations, "inspect", lambda conn: StaleInspector())
+    with engine.begin() as conn:
+        migrations._add_columns(conn)
+
+def test_hot_query_shapes_use_indexes(agent):
+    assert len(migrations.check_query_plans(engine)) == len(migrations._hot_queries())
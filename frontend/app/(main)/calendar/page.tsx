@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState } from "react";
-import api from "@/lib/api";
+import { fetchAllPages } from "@/lib/api";
 import { format, startOfMonth, endOfMonth, eachDayOfInterval, isSameDay, isToday } from "date-fns";
 
 export default function CalendarPage() {
@@ -11,8 +11,7 @@ export default function CalendarPage() {
   useEffect(() => {
     const fetchTasks = async () => {
       try {
-        const res = await api.get("/tasks");
-        setTasks(res.data);
+        setTasks(await fetchAllPages("/tasks"));
       } catch (error) {
         console.error("Failed to fetch tasks", error);
       }
@@ -1,24 +1,27 @@
 "use client";
 
 import { useEffect, useState } from "react";
-import api from "@/lib/api";
+import { fetchPage } from "@/lib/api";
 import { Mail, Phone } from "lucide-react";
 
 export default function ContactsPage() {
   const [contacts, setContacts] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+
+  const fetchContacts = async (cursor: string | null = null) => {
+    try {
+      const page = await fetchPage<any>("/contacts", {}, cursor);
+      setContacts((prev) => (cursor ? [...prev, ...page.items] : page.items));
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error("Failed to fetch contacts", error);
+    } finally {
+      setLoading(false);
+    }
+  };
 
   useEffect(() => {
-    const fetchContacts = async () => {
-      try {
-        const res = await api.get("/contacts");
-        setContacts(res.data);
-      } catch (error) {
-        console.error("Failed to fetch contacts", error);
-      } finally {
-        setLoading(false);
-      }
-    };
     fetchContacts();
   }, []);
 
@@ -64,6 +67,15 @@ export default function ContactsPage() {
           </div>
         ))}
       </div>
+
+      {nextCursor && (
+        <button
+          onClick={() => fetchContacts(nextCursor)}
+          className="w-full rounded-md border p-2 text-sm text-gray-600 hover:bg-gray-50 dark:text-gray-300 dark:hover:bg-gray-700"
+        >
+          Load more
+        </button>
+      )}
     </div>
   );
 }
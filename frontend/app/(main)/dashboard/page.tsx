@@ -3,7 +3,7 @@
 import { useEffect, useState } from "react";
 import api from "@/lib/api";
 // import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"; // Assuming we might make these later, but for now I'll inline styles or make simple components
-import { Users, CheckSquare, AlertCircle } from "lucide-react";
+import { Users, CheckSquare, AlertCircle, Mail } from "lucide-react";
 import { toast } from "sonner";
 
 // Simple Card components to avoid complex shadcn setup for now
@@ -24,24 +24,21 @@ export default function DashboardPage() {
     contacts: 0,
     tasksOpen: 0,
     tasksOverdue: 0,
+    unreadThreads: 0,
   });
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [contactsRes, tasksRes] = await Promise.all([
-          api.get("/contacts"),
-          api.get("/tasks?status=OPEN"),
-        ]);
-        
-        const tasks = tasksRes.data;
-        const overdue = tasks.filter((t: any) => t.overdue).length;
+        const res = await api.get("/dashboard/summary");
+        const summary = res.data;
 
         setStats({
-          contacts: contactsRes.data.length,
-          tasksOpen: tasks.length,
-          tasksOverdue: overdue,
+          contacts: summary.contacts_total,
+          tasksOpen: summary.tasks_by_status.OPEN || 0,
+          tasksOverdue: summary.overdue_tasks,
+          unreadThreads: summary.unread_threads,
         });
       } catch (error) {
         console.error("Failed to fetch dashboard data", error);
@@ -78,7 +75,7 @@ export default function DashboardPage() {
         </button>
       </div>
 
-      <div className="grid gap-4 md:grid-cols-3">
+      <div className="grid gap-4 md:grid-cols-4">
         <SimpleCard 
           title="Total Contacts" 
           value={stats.contacts} 
@@ -97,6 +94,12 @@ export default function DashboardPage() {
           icon={AlertCircle} 
           color="text-red-500" 
         />
+        <SimpleCard 
+          title="Awaiting Reply" 
+          value={stats.unreadThreads} 
+          icon={Mail} 
+          color="text-amber-500" 
+        />
       </div>
 
       <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-7">
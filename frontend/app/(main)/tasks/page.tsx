@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState } from "react";
-import api from "@/lib/api";
+import api, { fetchPage } from "@/lib/api";
 import { format } from "date-fns";
 import { CheckCircle, Clock } from "lucide-react";
 import { cn } from "@/lib/utils";
@@ -10,11 +10,13 @@ export default function TasksPage() {
   const [tasks, setTasks] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState("OPEN");
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-  const fetchTasks = async () => {
+  const fetchTasks = async (cursor: string | null = null) => {
     try {
-      const res = await api.get(`/tasks?status=${filter}`);
-      setTasks(res.data);
+      const page = await fetchPage<any>("/tasks", { status: filter }, cursor);
+      setTasks((prev) => (cursor ? [...prev, ...page.items] : page.items));
+      setNextCursor(page.next_cursor);
     } catch (error) {
       console.error("Failed to fetch tasks", error);
     } finally {
@@ -101,6 +103,15 @@ export default function TasksPage() {
             </div>
           </div>
         ))}
+
+        {nextCursor && (
+          <button
+            onClick={() => fetchTasks(nextCursor)}
+            className="w-full rounded-md border p-2 text-sm text-gray-600 hover:bg-gray-50 dark:text-gray-300 dark:hover:bg-gray-700"
+          >
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );
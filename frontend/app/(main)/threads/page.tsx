@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState } from "react";
-import api from "@/lib/api";
+import api, { fetchPage } from "@/lib/api";
 import { format } from "date-fns";
 import { Mail, ArrowRight, User } from "lucide-react";
 
@@ -9,18 +9,21 @@ export default function ThreadsPage() {
   const [threads, setThreads] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [selectedThread, setSelectedThread] = useState<any>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+
+  const fetchThreads = async (cursor: string | null = null) => {
+    try {
+      const page = await fetchPage<any>("/email-threads", {}, cursor);
+      setThreads((prev) => (cursor ? [...prev, ...page.items] : page.items));
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error("Failed to fetch threads", error);
+    } finally {
+      setLoading(false);
+    }
+  };
 
   useEffect(() => {
-    const fetchThreads = async () => {
-      try {
-        const res = await api.get("/email-threads");
-        setThreads(res.data);
-      } catch (error) {
-        console.error("Failed to fetch threads", error);
-      } finally {
-        setLoading(false);
-      }
-    };
     fetchThreads();
   }, []);
 
@@ -55,12 +58,27 @@ export default function ThreadsPage() {
                   {thread.last_message_at && format(new Date(thread.last_message_at), "MMM d")}
                 </span>
               </div>
-              <div className="text-sm text-gray-500 truncate">
-                Thread ID: {thread.thread_id}
+              <div className="flex justify-between text-sm text-gray-500">
+                <span className="truncate">{thread.contact_name || thread.contact_email || thread.thread_id}</span>
+                <span className="text-xs">{thread.message_count}</span>
               </div>
+              {thread.last_snippet && (
+                <div className="mt-1 text-xs text-gray-400 truncate">
+                  {thread.last_direction === "OUTGOING" && "You: "}
+                  {thread.last_snippet}
+                </div>
+              )}
             </div>
           ))}
         </div>
+        {nextCursor && (
+          <button
+            onClick={() => fetchThreads(nextCursor)}
+            className="w-full border-t p-3 text-sm text-gray-600 hover:bg-gray-50 dark:text-gray-300 dark:hover:bg-gray-700"
+          >
+            Load more
+          </button>
+        )}
       </div>
 
       {/* Thread Detail */}
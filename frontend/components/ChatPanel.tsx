@@ -1,8 +1,8 @@
 "use client";
 
 import { useState, useRef, useEffect } from "react";
-import { Send, MessageSquare, X } from "lucide-react";
-import api from "@/lib/api";
+import { Send, MessageSquare, X, RotateCcw } from "lucide-react";
+import { streamChat } from "@/lib/api";
 import { cn } from "@/lib/utils";
 
 interface Message {
@@ -10,11 +10,16 @@ interface Message {
   content: string;
 }
 
+// Each conversation gets its own server-side session, so starting over also resets the history
+const newSessionId = () => `web-${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 8)}`;
+
 export function ChatPanel() {
   const [isOpen, setIsOpen] = useState(false);
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
+  const [activity, setActivity] = useState<string | null>(null);
+  const [sessionId, setSessionId] = useState(newSessionId);
   const scrollRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
@@ -31,12 +36,33 @@ export function ChatPanel() {
     setInput("");
     setLoading(true);
 
+    // The assistant reply grows in place as tokens arrive
+    let started = false;
+    const showReply = (content: string) => {
+      const replace = started;
+      started = true;
+      setMessages((prev) =>
+        replace
+          ? [...prev.slice(0, -1), { role: "assistant", content }]
+          : [...prev, { role: "assistant", content }]
+      );
+    };
+
     try {
-      const res = await api.post("/chat", { message: userMsg });
-      setMessages((prev) => [
-        ...prev,
-        { role: "assistant", content: res.data.reply },
-      ]);
+      let streamed = "";
+      const res = await streamChat(
+        { message: userMsg, session_id: sessionId },
+        {
+          onToken: (text) => {
+            streamed += text;
+            setActivity(null);
+            showReply(streamed);
+          },
+          onToolCall: (name) => setActivity(`Running ${name.replace(/_/g, " ")}...`),
+          onToolResult: () => setActivity(null),
+        }
+      );
+      showReply(res.reply);
     } catch (error) {
       console.error("Chat error:", error);
       setMessages((prev) => [
@@ -45,9 +71,15 @@ export function ChatPanel() {
       ]);
     } finally {
       setLoading(false);
+      setActivity(null);
     }
   };
 
+  const startNewConversation = () => {
+    setMessages([]);
+    setSessionId(newSessionId());
+  };
+
   if (!isOpen) {
     return (
       <button
@@ -63,12 +95,22 @@ export function ChatPanel() {
     <div className="fixed bottom-4 right-4 flex h-[600px] w-[400px] flex-col rounded-xl border bg-white shadow-xl dark:bg-gray-900 dark:border-gray-800">
       <div className="flex items-center justify-between border-b p-4">
         <h3 className="font-semibold">Coach Agent</h3>
-        <button
-          onClick={() => setIsOpen(false)}
-          className="text-gray-500 hover:text-gray-900 dark:text-gray-400 dark:hover:text-gray-50"
-        >
-          <X className="h-5 w-5" />
-        </button>
+        <div className="flex items-center gap-2">
+          <button
+            onClick={startNewConversation}
+            disabled={loading}
+            title="New conversation"
+            className="text-gray-500 hover:text-gray-900 disabled:opacity-50 dark:text-gray-400 dark:hover:text-gray-50"
+          >
+            <RotateCcw className="h-4 w-4" />
+          </button>
+          <button
+            onClick={() => setIsOpen(false)}
+            className="text-gray-500 hover:text-gray-900 dark:text-gray-400 dark:hover:text-gray-50"
+          >
+            <X className="h-5 w-5" />
+          </button>
+        </div>
       </div>
       
       <div className="flex-1 overflow-auto p-4" ref={scrollRef}>
@@ -90,9 +132,9 @@ export function ChatPanel() {
             {msg.content}
           </div>
         ))}
-        {loading && (
+        {loading && (activity || messages[messages.length - 1]?.role === "user") && (
           <div className="mb-4 max-w-[80%] rounded-lg bg-gray-100 p-3 text-sm dark:bg-gray-800">
-            Thinking...
+            {activity || "Thinking..."}
           </div>
         )}
       </div>
@@ -32,4 +32,81 @@ api.interceptors.response.use(
   }
 );
 
+// List endpoints return one page at a time; pass next_cursor back as ?cursor= for the next one.
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+export async function fetchPage<T>(path: string, params: Record<string, unknown> = {}, cursor?: string | null): Promise<Page<T>> {
+  const res = await api.get<Page<T>>(path, { params: { ...params, ...(cursor ? { cursor } : {}) } });
+  return res.data;
+}
+
+// Follows next_cursor until the last page, for views that need the whole list (e.g. the calendar).
+export async function fetchAllPages<T>(path: string, params: Record<string, unknown> = {}): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const page: Page<T> = await fetchPage<T>(path, params, cursor);
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return items;
+}
+
+export interface ChatStreamHandlers {
+  onToken?: (text: string) => void;
+  onToolCall?: (name: string) => void;
+  onToolResult?: (name: string) => void;
+}
+
+// POST /chat/stream and dispatch its Server-Sent Events; resolves with the final ChatResponse.
+// axios can't read a response body incrementally in the browser, so this uses fetch.
+export async function streamChat(
+  body: { message: string; session_id?: string },
+  handlers: ChatStreamHandlers = {}
+): Promise<{ reply: string; structured: unknown }> {
+  const token = typeof window !== 'undefined' ? localStorage.getItem('token') : null;
+  const res = await fetch(`${api.defaults.baseURL}/chat/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok || !res.body) {
+    throw new Error(`Chat stream failed with status ${res.status}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : {};
+      if (event === 'token') handlers.onToken?.(payload.text);
+      else if (event === 'tool_call') handlers.onToolCall?.(payload.name);
+      else if (event === 'tool_result') handlers.onToolResult?.(payload.name);
+      else if (event === 'final') return payload;
+    }
+  }
+  throw new Error('Chat stream ended without a final response');
+}
+
 export default api;